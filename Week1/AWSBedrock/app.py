@@ -1,240 +1,40 @@
 # app.py
-import os
 import json
-import re
-import boto3
+import time
 import streamlit as st
 
-# -----------------------
-# Configuration
-# -----------------------
-MODEL_ID = os.environ.get("BEDROCK_MODEL_ID", "meta.llama3-8b-instruct-v1:0")
-REGION = os.environ.get("AWS_REGION", "ap-south-1")
-
-# Create bedrock client
-bedrock = boto3.client("bedrock-runtime", region_name=REGION)
-
-
-# -----------------------
-# Dietary rules & replacements
-# -----------------------
-dietary_rules = {
-    "none": {
-        "blocked": [],
-        "replacement": {}
-    },
-    "vegan": {
-        "blocked": ["chicken", "fish", "beef", "pork", "egg", "milk", "cheese", "yogurt", "butter", "honey"],
-        "replacement": {
-            "chicken": "tofu",
-            "fish": "jackfruit",
-            "beef": "tempeh",
-            "pork": "jackfruit",
-            "egg": "flax egg",
-            "milk": "soy milk",
-            "cheese": "vegan cheese",
-            "yogurt": "coconut yogurt",
-            "butter": "vegan butter",
-            "honey": "maple syrup"
-        }
-    },
-    "vegetarian": {
-        "blocked": ["chicken", "fish", "beef", "pork"],
-        "replacement": {
-            "chicken": "paneer",
-            "fish": "mushrooms",
-            "beef": "soy chunks",
-            "pork": "jackfruit"
-        }
-    },
-    "pescatarian": {
-        "blocked": ["chicken", "beef", "pork"],
-        "replacement": {
-            "chicken": "salmon",
-            "beef": "tuna",
-            "pork": "salmon"
-        }
-    },
-    "gluten-free": {
-        "blocked": ["wheat", "barley", "rye", "pasta", "all-purpose flour", "breadcrumbs"],
-        "replacement": {
-            "wheat": "gluten-free flour",
-            "barley": "quinoa",
-            "rye": "buckwheat",
-            "pasta": "gluten-free pasta",
-            "all-purpose flour": "gluten-free flour",
-            "breadcrumbs": "crushed gluten-free crackers"
-        }
-    }
-}
+from bedrock_helper import MODEL_ID, call_bedrock, get_metrics
+from diet_rules import dietary_rules, preprocess_ingredients
+from recipe_cache import RecipeCache, cache_key
+from recipe_generator import build_prompt, iter_recipes_parallel, parse_model_output
 
 # -----------------------
 # Helpers
 # -----------------------
-def normalize_ingredient_name(s: str) -> str:
-    return s.strip().lower()
-
-def preprocess_ingredients(raw_ingredients: str, diet_key: str):
-    """Replace blocked ingredients automatically and return (cleaned_string, replacements_list)."""
-    items = [normalize_ingredient_name(i) for i in raw_ingredients.split(",") if i.strip()]
-    processed = []
-    replacements = []  # tuples (original, replaced)
-    rules = dietary_rules.get(diet_key, dietary_rules["none"])
-    blocked = set(rules["blocked"])
-    repl_map = rules["replacement"]
-
-    for it in items:
-        # exact match replacement first
-        if it in blocked:
-            if it in repl_map:
-                processed.append(repl_map[it])
-                replacements.append((it, repl_map[it]))
-            else:
-                # drop it (no replacement)
-                replacements.append((it, None))
-        else:
-            # also check partial matches (e.g., "chicken breast" -> "chicken")
-            matched = False
-            for b in blocked:
-                if b in it:
-                    if b in repl_map:
-                        # replace the blocked substring with replacement
-                        new_it = it.replace(b, repl_map[b])
-                        processed.append(new_it)
-                        replacements.append((it, new_it))
-                    else:
-                        # drop the blocked substring entirely
-                        new_it = re.sub(r"\b" + re.escape(b) + r"\b", "", it).strip()
-                        if new_it:
-                            processed.append(new_it)
-                        replacements.append((it, None))
-                    matched = True
-                    break
-            if not matched:
-                processed.append(it)
-
-    # dedupe while preserving order
-    seen = set()
-    processed_unique = []
-    for p in processed:
-        if p not in seen:
-            seen.add(p)
-            processed_unique.append(p)
-
-    return ", ".join(processed_unique), replacements
-
-def build_prompt(ingredients: str, num_recipes: int, diet: str, difficulty: str, servings: int):
+def render_recipe(i: int, r: dict) -> str:
+    return f"""
+    <div class="recipe-card">
+        <div class="recipe-title">{i}. {r.get('title', 'Untitled')}</div>
+        <div class="recipe-meta">
+            Servings: {r.get('servings', '-')} 
+            {' • Difficulty: ' + r.get('difficulty') if r.get('difficulty') else ''} 
+            {' • Time: ' + r.get('estimated_time') if r.get('estimated_time') else ''}
+        </div>
+        <div class="recipe-section-title">Ingredients</div>
+        <ul class="recipe-list">
+            {''.join(f'<li>{item}</li>' for item in r.get('ingredients', []))}
+        </ul>
+        <div class="recipe-section-title">Steps</div>
+        <ol class="recipe-list">
+            {''.join(f'<li>{step}</li>' for step in r.get('steps', []))}
+        </ol>
+        {f'<div class="recipe-section-title">Notes</div><p>{r.get("notes")}</p>' if r.get('notes') else ''}
+    </div>
     """
-    Ask model for a JSON array of recipe objects. Each object:
-    { "title", "servings", "ingredients": [...], "steps": [...], "difficulty", "estimated_time", "notes" }
-    """
-    diet_wording = diet if diet != "none" else "no dietary restriction"
-    difficulty_text = difficulty if difficulty != "Any" else "Any difficulty"
-
-    prompt = f"""
-You are a helpful, precise recipe generator.
-
-Constraints:
-- Diet: {diet_wording}. STRICTLY follow this; do NOT include disallowed ingredients.
-- Difficulty: {difficulty_text}.
-- Servings: approximately {servings} per recipe.
-- Use ONLY the provided ingredients (and common pantry items like salt, pepper, oil, water, sugar). Do NOT invent rare ingredients.
-- If any provided ingredient was automatically replaced, mention the replacement in the "notes" field for that recipe.
-
-Task:
-JSON Schema:
-[
-  {{
-    "title": "string",
-    "servings": integer,
-    "ingredients": ["string", "string"],
-    "steps": ["string", "string"],
-    "difficulty": "Easy" | "Medium" | "Hard",
-    "estimated_time": "string (e.g., '25 minutes')",
-    "notes": "string"
-  }}
-]
-
-Now generate exactly {num_recipes} recipes using only:
-{ingredients}
 
-Your entire response must be a single JSON array following the schema above, starting with '[' and ending with ']'.
-"""
-    return prompt.strip()
-def clean_json_output(text: str):
-    """Extracts JSON array from any text and returns as Python object."""
-    match = re.search(r"\[.*\]", text, re.DOTALL)
-    if match:
-        try:
-            return json.loads(match.group(0))
-        except json.JSONDecodeError:
-            return None
-    return None
-
-def call_bedrock(prompt: str, max_gen_len: int = 700, temperature: float = 0.25, top_p: float = 0.9) -> str:
-    """Calls Bedrock and always returns raw text output from the model."""
-    payload = {
-        "prompt": prompt,
-        "max_gen_len": max_gen_len,
-        "temperature": temperature,
-        "top_p": top_p
-    }
-
-    resp = bedrock.invoke_model(
-        modelId=MODEL_ID,
-        contentType="application/json",
-        accept="application/json",
-        body=json.dumps(payload).encode("utf-8")
-    )
-
-    body_text = resp["body"].read().decode("utf-8")
-
-    try:
-        parsed = json.loads(body_text)
-        # Common Bedrock output patterns
-        if isinstance(parsed, dict):
-            if "outputs" in parsed and isinstance(parsed["outputs"], list):
-                return parsed["outputs"][0].get("text", "")
-            for k in ("generation", "output", "results", "text"):
-                if k in parsed and isinstance(parsed[k], str):
-                    return parsed[k]
-        elif isinstance(parsed, list):
-            # If the model directly gave a list, return it as JSON string
-            return json.dumps(parsed)
-    except json.JSONDecodeError:
-        pass
-
-    return body_text  # if parsing as JSON fails, just return raw string
-
-
-def parse_model_output(raw_text: str):
-    """Extracts and parses a JSON array of recipes from model output text."""
-    if not raw_text:
-        return None
-
-    # Try direct JSON parsing
-    try:
-        parsed = json.loads(raw_text)
-        if isinstance(parsed, list):
-            return parsed
-    except json.JSONDecodeError:
-        pass
-
-    # Try extracting JSON array from within the text
-    match = re.search(r"\[\s*\{.*\}\s*\]", raw_text, re.DOTALL)
-    if match:
-        json_str = match.group(0)
-        try:
-            return json.loads(json_str)
-        except json.JSONDecodeError:
-            # Try fixing trailing commas
-            json_str = re.sub(r",\s*([\]}])", r"\1", json_str)
-            try:
-                return json.loads(json_str)
-            except json.JSONDecodeError:
-                return None
-
-    return None
+@st.cache_resource
+def get_recipe_cache():
+    return RecipeCache()
 
 # -----------------------
 # Streamlit UI
@@ -287,9 +87,15 @@ st.title("🍳 AI Recipe Generator")
 with st.sidebar:
     st.header("Options")
     num_recipes = st.slider("Number of recipes", 1, 5, 2)
-    dietary_choice = st.selectbox("Dietary restriction", ["none", "vegan", "vegetarian", "pescatarian", "gluten-free"])
+    dietary_choice = st.selectbox("Dietary restriction", list(dietary_rules))
     difficulty = st.selectbox("Preferred difficulty", ["Any", "Easy", "Medium", "Hard"])
     servings = st.number_input("Servings (approx.)", min_value=1, max_value=10, value=2)
+    parallel = st.toggle(
+        "Parallel generation",
+        value=True,
+        help="One small call per recipe, issued concurrently, instead of one long multi-recipe call",
+    )
+    fresh = st.checkbox("Give me something new", value=False, help="Skip cached recipes and ask the model again")
 
 st.markdown("Enter the ingredients you have (comma-separated). Example: `tomato, chicken, rice, garlic`")
 ingredients_input = st.text_area("Ingredients", value="", height=120)
@@ -308,36 +114,78 @@ if generate:
                 elif repl != orig:
                     st.info(f"Replaced '{orig}' → '{repl}' to satisfy {dietary_choice} diet.")
 
-        prompt = build_prompt(cleaned_ingredients, num_recipes, dietary_choice, difficulty, servings)
-        with st.spinner("Generating recipes..."):
-            raw = call_bedrock(prompt, max_gen_len=800, temperature=0.28, top_p=0.9)
+        recipe_cache = get_recipe_cache()
+        key = cache_key(
+            cleaned_ingredients,
+            diet=dietary_choice,
+            difficulty=difficulty,
+            servings=int(servings),
+            num_recipes=num_recipes,
+            model=MODEL_ID,
+            mode="parallel" if parallel else "single",
+        )
+        recipes = None if fresh else recipe_cache.get(key)
+        if recipes:
+            st.caption("⚡ Served from cache")
+            for i, r in enumerate(recipes, start=1):
+                st.markdown(render_recipe(i, r), unsafe_allow_html=True)
+
+        elif parallel:
+            # one placeholder per recipe so cards appear in order as calls finish
+            slots = [st.empty() for _ in range(num_recipes)]
+            for slot in slots:
+                slot.info("Generating recipe...")
+            results = [None] * num_recipes
+            started = time.perf_counter()
+            for idx, recipe, raw in iter_recipes_parallel(
+                call_bedrock, cleaned_ingredients, num_recipes, dietary_choice, difficulty, servings
+            ):
+                results[idx] = recipe
+                if recipe:
+                    slots[idx].markdown(render_recipe(idx + 1, recipe), unsafe_allow_html=True)
+                else:
+                    with slots[idx].expander(f"Recipe {idx + 1} failed or duplicated — raw response"):
+                        st.code(raw)
+            latency_s = time.perf_counter() - started
+
+            recipes = [r for r in results if r]
+            if recipes:
+                # a partial set stays uncached so the next request retries the missing recipes
+                if len(recipes) == num_recipes:
+                    recipe_cache.put(key, recipes, latency_s)
+                st.caption(f"Generated {len(recipes)}/{num_recipes} recipes in {latency_s:.1f}s (parallel)")
+            else:
+                st.error("Couldn't parse any model output.")
 
-        recipes = parse_model_output(raw)
-        if not recipes:
-            st.error("Couldn't parse model output. Showing raw response below for debugging.")
-            st.code(raw if isinstance(raw, str) else json.dumps(raw, indent=2))
-        
         else:
-            for i, r in enumerate(recipes, start=1):
-                recipe_html = f"""
-                <div class="recipe-card">
-                    <div class="recipe-title">{i}. {r.get('title', 'Untitled')}</div>
-                    <div class="recipe-meta">
-                        Servings: {r.get('servings', '-')} 
-                        {' • Difficulty: ' + r.get('difficulty') if r.get('difficulty') else ''} 
-                        {' • Time: ' + r.get('estimated_time') if r.get('estimated_time') else ''}
-                    </div>
-                    <div class="recipe-section-title">Ingredients</div>
-                    <ul class="recipe-list">
-                        {''.join(f'<li>{item}</li>' for item in r.get('ingredients', []))}
-                    </ul>
-                    <div class="recipe-section-title">Steps</div>
-                    <ol class="recipe-list">
-                        {''.join(f'<li>{step}</li>' for step in r.get('steps', []))}
-                    </ol>
-                    {f'<div class="recipe-section-title">Notes</div><p>{r.get("notes")}</p>' if r.get('notes') else ''}
-                </div>
-                """
-                
-                st.markdown(recipe_html, unsafe_allow_html=True)
-            
+            prompt = build_prompt(cleaned_ingredients, num_recipes, dietary_choice, difficulty, servings)
+            started = time.perf_counter()
+            with st.spinner("Generating recipes..."):
+                raw = call_bedrock(prompt, max_gen_len=800, temperature=0.28, top_p=0.9)
+            latency_s = time.perf_counter() - started
+
+            recipes = parse_model_output(raw)
+            if not recipes:
+                st.error("Couldn't parse model output. Showing raw response below for debugging.")
+                st.code(raw if isinstance(raw, str) else json.dumps(raw, indent=2))
+            else:
+                if len(recipes) >= num_recipes:  # not a truncated reply
+                    recipe_cache.put(key, recipes, latency_s)
+                st.caption(f"Generated in {latency_s:.1f}s")
+                for i, r in enumerate(recipes, start=1):
+                    st.markdown(render_recipe(i, r), unsafe_allow_html=True)
+
+# Cache & Bedrock stats
+with st.sidebar:
+    stats = get_recipe_cache().stats()
+    st.markdown("---")
+    st.caption(
+        f"Cache: {stats['hit_rate']:.0%} hit rate ({stats['hits']} hits / {stats['misses']} misses) · "
+        f"{stats['saved_s']:.1f}s of generation saved"
+    )
+    calls = get_metrics()
+    if calls["calls"]:
+        st.caption(
+            f"Bedrock: {calls['calls']} calls · p50 {calls['p50_s']:.1f}s · p95 {calls['p95_s']:.1f}s · "
+            f"peak concurrency {calls['peak_in_flight']} · {calls['throttles']} throttled · {calls['retries']} retries"
+        )
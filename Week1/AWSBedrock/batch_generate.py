@@ -0,0 +1,200 @@
+# batch_generate.py
+"""
+Offline batch recipe generation.
+
+Reads ingredient/diet rows from CSV or JSONL, generates recipes with bounded concurrency and
+appends one JSON line per row to the output file as soon as it finishes. The output file is
+also the checkpoint: rerunning the same command skips rows that already reached a final status
+(ok, skipped, invalid) and retries the rest; a retried row's newest line supersedes the older
+ones. The report always describes the whole output file, one record per row id.
+
+Input columns/keys: ingredients (required), diet, difficulty, servings, num_recipes, id
+Rows whose servings/num_recipes aren't whole numbers are written as "invalid" records.
+
+Usage:
+    python batch_generate.py rows.csv --out recipes.jsonl --concurrency 8
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from shared.batch import append_record, iter_completed, load_results, percentile, read_rows, terminate_torn_line
+from bedrock_helper import MODEL_ID, get_metrics, invoke
+from diet_rules import preprocess_ingredients
+from recipe_cache import cache_key
+from recipe_generator import build_prompt, parse_model_output
+
+# On-demand price per 1K tokens for the default Llama 3 8B model (override on the command line)
+PRICE_IN_PER_1K = 0.0003
+PRICE_OUT_PER_1K = 0.0006
+# retrying these can't change the outcome; "error" and "parse_error" rows are retried on resume
+TERMINAL_STATUSES = ("ok", "skipped", "invalid")
+
+
+# -----------------------
+# Rows
+# -----------------------
+def _positive_int(row: dict, name: str, default: int) -> int:
+    value = row.get(name) or default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a whole number, got {value!r}") from None
+    if number < 1:
+        raise ValueError(f"{name} must be at least 1, got {value!r}")
+    return number
+
+
+def normalize_row(row: dict, defaults: argparse.Namespace) -> dict:
+    """The job for a row; raises ValueError when servings/num_recipes aren't usable numbers."""
+    diet = str(row.get("diet") or defaults.diet).strip().lower()
+    cleaned, replacements = preprocess_ingredients(str(row.get("ingredients") or ""), diet)
+    job = {
+        "ingredients": cleaned,
+        "diet": diet,
+        "difficulty": str(row.get("difficulty") or defaults.difficulty).strip(),
+        "servings": _positive_int(row, "servings", defaults.servings),
+        "num_recipes": _positive_int(row, "num_recipes", defaults.num_recipes),
+        "replacements": replacements,
+    }
+    # same normalization as the app's cache: reordered/re-cased duplicates collapse to one id
+    job["id"] = str(row.get("id") or cache_key(
+        cleaned,
+        diet=job["diet"],
+        difficulty=job["difficulty"],
+        servings=job["servings"],
+        num_recipes=job["num_recipes"],
+        model=MODEL_ID,
+    ))
+    return job
+
+
+def invalid_row_record(row: dict, error: Exception) -> dict:
+    """An "invalid" record for a row normalize_row rejected, keyed by its id or its content."""
+    raw = json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    return {
+        "id": str(row.get("id") or hashlib.sha256(raw.encode("utf-8")).hexdigest()),
+        "ingredients": row.get("ingredients"),
+        "status": "invalid",
+        "error": str(error),
+    }
+
+
+# -----------------------
+# Work
+# -----------------------
+def run_job(job: dict, max_gen_len: int) -> dict:
+    record = {k: job[k] for k in ("id", "ingredients", "diet", "difficulty", "servings", "num_recipes")}
+    if not job["ingredients"]:
+        return {**record, "status": "skipped", "error": "no ingredients left after diet rules"}
+    prompt = build_prompt(job["ingredients"], job["num_recipes"], job["diet"], job["difficulty"], job["servings"])
+    try:
+        result = invoke(prompt, max_gen_len=max_gen_len, temperature=0.28, top_p=0.9)
+    except Exception as e:
+        return {**record, "status": "error", "error": str(e)}
+
+    recipes = parse_model_output(result["text"])
+    record.update({
+        "input_tokens": result["input_tokens"],
+        "output_tokens": result["output_tokens"],
+        "latency_s": round(result["latency_s"], 3),
+    })
+    if not recipes:
+        return {**record, "status": "parse_error", "raw": result["text"]}
+    return {**record, "status": "ok", "recipes": recipes}
+
+
+def build_report(records, elapsed_s: float, args, run_rows: int = None) -> dict:
+    """Totals over `records`; `run_rows` (default: all of them) were processed in `elapsed_s`."""
+    run_rows = len(records) if run_rows is None else run_rows
+    calls = [r for r in records if "latency_s" in r]
+    ok = sum(r["status"] == "ok" for r in records)
+    parse_errors = sum(r["status"] == "parse_error" for r in records)
+    tokens_in = sum(r.get("input_tokens", 0) for r in records)
+    tokens_out = sum(r.get("output_tokens", 0) for r in records)
+    latencies = [r["latency_s"] for r in calls]
+    return {
+        "rows": len(records),
+        "ok": ok,
+        "parse_errors": parse_errors,
+        "errors": sum(r["status"] == "error" for r in records),
+        "skipped": sum(r["status"] == "skipped" for r in records),
+        "invalid": sum(r["status"] == "invalid" for r in records),
+        "parse_failure_rate": parse_errors / len(calls) if calls else 0.0,
+        "recipes": sum(len(r.get("recipes", [])) for r in records),
+        "input_tokens": tokens_in,
+        "output_tokens": tokens_out,
+        "estimated_cost_usd": round(tokens_in / 1000 * args.price_in + tokens_out / 1000 * args.price_out, 4),
+        "latency_p50_s": percentile(latencies, 0.50),
+        "latency_p90_s": percentile(latencies, 0.90),
+        "latency_p99_s": percentile(latencies, 0.99),
+        "run_rows": run_rows,
+        "elapsed_s": round(elapsed_s, 2),
+        "rows_per_min": round(run_rows / elapsed_s * 60, 1) if elapsed_s else 0.0,
+        "concurrency": args.concurrency,
+        "bedrock": get_metrics(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-generate recipes from a CSV/JSONL file.")
+    parser.add_argument("input", help="rows as .csv or .jsonl")
+    parser.add_argument("--out", default="batch_recipes.jsonl", help="output JSONL (also the checkpoint)")
+    parser.add_argument("--report", default=None, help="run report path (default: <out>.report.json)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--diet", default="none")
+    parser.add_argument("--difficulty", default="Any")
+    parser.add_argument("--servings", type=int, default=2)
+    parser.add_argument("--num-recipes", type=int, default=2)
+    parser.add_argument("--max-gen-len", type=int, default=800)
+    parser.add_argument("--price-in", type=float, default=PRICE_IN_PER_1K, help="USD per 1K input tokens")
+    parser.add_argument("--price-out", type=float, default=PRICE_OUT_PER_1K, help="USD per 1K output tokens")
+    args = parser.parse_args()
+
+    done = {rid for rid, r in load_results(args.out).items() if r.get("status") in TERMINAL_STATUSES}
+    terminate_torn_line(args.out)
+    records = []
+    queued = set()
+    started = time.perf_counter()
+
+    def tasks():
+        for row in read_rows(args.input):
+            try:
+                job = normalize_row(row, args)
+            except ValueError as e:
+                record = invalid_row_record(row, e)
+                if record["id"] not in done and record["id"] not in queued:
+                    queued.add(record["id"])
+                    yield lambda record=record: record
+                continue
+            if job["id"] in done or job["id"] in queued:
+                continue
+            queued.add(job["id"])
+            yield partial(run_job, job, args.max_gen_len)
+
+    with open(args.out, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for record in iter_completed(pool, tasks(), window=args.concurrency * 2):
+            append_record(out, record)
+            records.append(record)
+            if len(records) % 25 == 0:
+                print(f"{len(records)} rows done", file=sys.stderr)
+
+    # the whole file, not just this run: resumed rows count, retried rows count once
+    report = build_report(list(load_results(args.out).values()), time.perf_counter() - started, args,
+                          run_rows=len(records))
+    report["resumed_skipped"] = len(done)
+    report_path = args.report or f"{os.path.splitext(args.out)[0]}.report.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps({k: v for k, v in report.items() if k != "bedrock"}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,241 @@
 # bedrock_helper.py
-import os
 import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
 import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
 
-# Config
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from shared import telemetry
+from shared.rate_limit import TokenBucket
+
+# -----------------------
+# Configuration
+# -----------------------
 MODEL_ID = os.environ.get("BEDROCK_MODEL_ID", "meta.llama3-8b-instruct-v1:0")
 REGION = os.environ.get("AWS_REGION", "ap-south-1")
+ENDPOINT_URL = os.environ.get("BEDROCK_ENDPOINT_URL") or None  # e.g. a local stand-in server
+MAX_POOL_CONNECTIONS = int(os.environ.get("BEDROCK_MAX_POOL", "20"))
+MAX_ATTEMPTS = int(os.environ.get("BEDROCK_MAX_ATTEMPTS", "6"))
+READ_TIMEOUT = int(os.environ.get("BEDROCK_READ_TIMEOUT", "120"))
+# Client-side request budget; 0 disables the limiter
+REQUESTS_PER_SECOND = float(os.environ.get("BEDROCK_RPS", "0"))
+BURST = int(os.environ.get("BEDROCK_BURST", "5"))
+
+THROTTLE_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException"}
 
-client = boto3.client("bedrock-runtime", region_name=REGION)
 
-def call_bedrock(prompt: str, max_tokens: int = 800, temperature: float = 0.2):
+# -----------------------
+# Shared client
+# -----------------------
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
     """
-    Calls AWS Bedrock with Meta Llama 3 8B Instruct.
-    Adjusted for correct payload format: prompt, max_gen_len, temperature.
+    Process-wide bedrock-runtime client: one connection pool sized for concurrent calls and
+    botocore's adaptive retry mode (client-side rate adjustment on throttling).
+    boto3 clients are thread-safe, so every caller shares this one.
     """
-    payload = {
-        "prompt": prompt,
-        "max_gen_len": max_tokens,      # Token limit
-        "temperature": temperature,     # Creativity level
-        "top_p": 0.9                     # Sampling diversity (optional)
-    }
-
-    resp = client.invoke_model(
-        modelId=MODEL_ID,
-        contentType="application/json",
-        accept="application/json",
-        body=json.dumps(payload).encode("utf-8")
-    )
-
-    body_bytes = resp["body"].read()
-    body_text = body_bytes.decode("utf-8")
-
-    # Llama 3 returns JSON with a 'generation' key
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                config = Config(
+                    region_name=REGION,
+                    max_pool_connections=MAX_POOL_CONNECTIONS,
+                    retries={"mode": "adaptive", "max_attempts": MAX_ATTEMPTS},
+                    connect_timeout=10,
+                    read_timeout=READ_TIMEOUT,
+                )
+                _client = boto3.client("bedrock-runtime", config=config, endpoint_url=ENDPOINT_URL)
+    return _client
+
+
+# -----------------------
+# Token-bucket limiter
+# -----------------------
+limiter = TokenBucket(REQUESTS_PER_SECOND, BURST)
+
+
+# -----------------------
+# Metrics
+# -----------------------
+class CallMetrics:
+    """Rolling per-call latency plus throttle/retry/error counters, safe to share across threads."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.throttles = 0
+        self.retries = 0
+        self.limiter_wait_s = 0.0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def start(self, waited: float):
+        with self._lock:
+            self.limiter_wait_s += waited
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finish(self, latency_s: float, retries: int = 0, error: str = None):
+        with self._lock:
+            self.in_flight -= 1
+            self.calls += 1
+            self.retries += retries
+            self._latencies.append(latency_s)
+            if error:
+                self.errors += 1
+                if error in THROTTLE_CODES:
+                    self.throttles += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lat = sorted(self._latencies)
+            snap = {
+                "calls": self.calls,
+                "errors": self.errors,
+                "throttles": self.throttles,
+                "retries": self.retries,
+                "limiter_wait_s": self.limiter_wait_s,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+            }
+
+        def pct(p):
+            return lat[min(len(lat) - 1, int(p * len(lat)))] if lat else 0.0
+
+        snap.update({"p50_s": pct(0.50), "p95_s": pct(0.95), "p99_s": pct(0.99)})
+        return snap
+
+
+metrics = CallMetrics()
+
+
+def get_metrics() -> dict:
+    return metrics.snapshot()
+
+
+# -----------------------
+# Model families
+# -----------------------
+def build_payload(model_id: str, prompt: str, max_tokens: int, temperature: float, top_p: float) -> dict:
+    """Request body in the shape each model family expects."""
+    if "anthropic." in model_id:
+        return {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "top_p": top_p,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+    if "amazon.titan" in model_id:
+        return {
+            "inputText": prompt,
+            "textGenerationConfig": {"maxTokenCount": max_tokens, "temperature": temperature, "topP": top_p},
+        }
+    if "mistral." in model_id:
+        return {"prompt": prompt, "max_tokens": max_tokens, "temperature": temperature, "top_p": top_p}
+    if "cohere." in model_id:
+        return {"prompt": prompt, "max_tokens": max_tokens, "temperature": temperature, "p": top_p}
+    # Meta Llama (default)
+    return {"prompt": prompt, "max_gen_len": max_tokens, "temperature": temperature, "top_p": top_p}
+
+
+def decode_response(body_text: str) -> str:
+    """Extracts generated text from any supported family's response; falls back to the raw body."""
     try:
         parsed = json.loads(body_text)
-        return parsed.get("generation") or body_text
-    except Exception:
+    except json.JSONDecodeError:
+        return body_text
+
+    if isinstance(parsed, list):
+        # If the model directly gave a list, return it as JSON string
+        return json.dumps(parsed)
+    if not isinstance(parsed, dict):
         return body_text
+
+    if isinstance(parsed.get("generation"), str):  # Meta Llama
+        return parsed["generation"]
+    content = parsed.get("content")
+    if isinstance(content, list):  # Anthropic messages
+        return "".join(c.get("text", "") for c in content if isinstance(c, dict))
+    for key, field in (("outputs", "text"), ("generations", "text"), ("results", "outputText")):
+        items = parsed.get(key)
+        if isinstance(items, list) and items and isinstance(items[0], dict):  # Mistral / Cohere / Titan
+            return items[0].get(field, "")
+    if isinstance(parsed.get("completions"), list) and parsed["completions"]:  # AI21
+        return parsed["completions"][0].get("data", {}).get("text", "")
+    for k in ("completion", "output", "results", "text"):
+        if isinstance(parsed.get(k), str):
+            return parsed[k]
+    return body_text
+
+
+# -----------------------
+# Calls
+# -----------------------
+def _header_int(resp: dict, name: str) -> int:
+    try:
+        return int(resp.get("ResponseMetadata", {}).get("HTTPHeaders", {}).get(name, 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def invoke(prompt: str, max_gen_len: int = 700, temperature: float = 0.25, top_p: float = 0.9,
+           model_id: str = MODEL_ID) -> dict:
+    """
+    Calls Bedrock through the shared client.
+    Returns {"text", "input_tokens", "output_tokens", "latency_s"}; token counts come from the
+    x-amzn-bedrock-*-token-count response headers (0 if absent).
+    """
+    metrics.start(limiter.acquire())
+    started = time.perf_counter()
+    retries = 0
+    error = None
+    input_tokens = output_tokens = None
+    try:
+        resp = get_client().invoke_model(
+            modelId=model_id,
+            contentType="application/json",
+            accept="application/json",
+            body=json.dumps(build_payload(model_id, prompt, max_gen_len, temperature, top_p)).encode("utf-8"),
+        )
+        retries = resp.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+        text = decode_response(resp["body"].read().decode("utf-8"))
+        input_tokens = _header_int(resp, "x-amzn-bedrock-input-token-count")
+        output_tokens = _header_int(resp, "x-amzn-bedrock-output-token-count")
+        return {
+            "text": text,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "latency_s": time.perf_counter() - started,
+        }
+    except ClientError as e:
+        error = e.response.get("Error", {}).get("Code", "ClientError")
+        retries = e.response.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+        raise
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        latency_s = time.perf_counter() - started
+        metrics.finish(latency_s, retries, error)
+        telemetry.record("bedrock", model_id, latency_s, prompt_tokens=input_tokens,
+                         completion_tokens=output_tokens, error=error)
+
+
+def call_bedrock(prompt: str, max_gen_len: int = 700, temperature: float = 0.25, top_p: float = 0.9,
+                 model_id: str = MODEL_ID) -> str:
+    """Calls Bedrock and always returns raw text output from the model."""
+    return invoke(prompt, max_gen_len, temperature, top_p, model_id)["text"]
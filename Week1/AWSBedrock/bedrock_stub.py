@@ -0,0 +1,208 @@
+# bedrock_stub.py
+"""
+Local stand-in for the bedrock-runtime InvokeModel and InvokeModelWithResponseStream APIs.
+
+Point boto3 at it with BEDROCK_ENDPOINT_URL=http://127.0.0.1:8765 (any dummy AWS credentials
+work; signatures are not checked). Responses use the Meta Llama body shape and token-count
+headers, streamed responses use the AWS event-stream framing boto3 expects.
+
+Usage:
+    python bedrock_stub.py --latency lognormal:-0.5,0.4 --tokens-per-sec 80 \
+        --throttle-rate 0.05 --malformed-rate 0.1
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import re
+import struct
+import sys
+import time
+import zlib
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from shared.stub_server import StubHandler, StubStats, serve as serve_stub
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "fuzz_corpus.jsonl")
+CHUNK_TOKENS = 8  # tokens per streamed chunk
+
+DISHES = ["Skillet", "Soup", "Bowl", "Bake", "Wraps", "Curry", "Salad", "Fritters"]
+
+
+# -----------------------
+# Behaviour
+# -----------------------
+def load_malformed(path: str = CORPUS_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line)["text"] for line in f if line.strip()]
+    except FileNotFoundError:
+        return ["Sorry, I can't help with that request.", '[{"title": "Cut off']
+
+
+def canned_recipes(prompt: str) -> str:
+    """A valid recipe array sized to the 'generate exactly N recipes' instruction in the prompt."""
+    m = re.search(r"generate exactly (\d+) recipe", prompt)
+    count = int(m.group(1)) if m else 1
+    m = re.search(r"using only:\s*\n(.+)", prompt)
+    ingredients = [i.strip() for i in (m.group(1) if m else "rice").split(",") if i.strip()]
+    recipes = []
+    for i in range(count):
+        main = ingredients[i % len(ingredients)]
+        recipes.append({
+            "title": f"{main.title()} {random.choice(DISHES)} #{random.randint(1, 9999)}",
+            "servings": 2,
+            "ingredients": ingredients,
+            "steps": [f"Prepare the {x}." for x in ingredients] + ["Cook everything together and season to taste."],
+            "difficulty": random.choice(["Easy", "Medium"]),
+            "estimated_time": f"{random.randint(15, 60)} minutes",
+            "notes": "Generated by the local Bedrock stand-in.",
+        })
+    return json.dumps(recipes, indent=2)
+
+
+# -----------------------
+# Event-stream framing
+# -----------------------
+def _event_header(name: str, value: str) -> bytes:
+    name_b = name.encode("utf-8")
+    value_b = value.encode("utf-8")
+    return struct.pack("B", len(name_b)) + name_b + b"\x07" + struct.pack(">H", len(value_b)) + value_b
+
+
+def encode_event(payload: bytes, event_type: str = "chunk") -> bytes:
+    """One application/vnd.amazon.eventstream message."""
+    headers = (
+        _event_header(":event-type", event_type)
+        + _event_header(":content-type", "application/json")
+        + _event_header(":message-type", "event")
+    )
+    total = 12 + len(headers) + len(payload) + 4
+    prelude = struct.pack(">II", total, len(headers))
+    prelude += struct.pack(">I", zlib.crc32(prelude) & 0xFFFFFFFF)
+    message = prelude + headers + payload
+    return message + struct.pack(">I", zlib.crc32(message) & 0xFFFFFFFF)
+
+
+# -----------------------
+# Server
+# -----------------------
+class BedrockStubHandler(StubHandler):
+    malformed = []
+
+    def do_POST(self):
+        m = re.match(r"^/model/([^/]+)/(invoke|invoke-with-response-stream)$", self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        raw_body = self.rfile.read(length)
+        if not m:
+            self._send_json(404, {"message": f"Unknown path {self.path}"})
+            return
+
+        self.stats.bump("requests")
+        cfg = self.config
+        if random.random() < cfg.throttle_rate:
+            self.stats.bump("throttled")
+            time.sleep(0.01)
+            self._send_json(
+                429, {"message": "Too many requests, please wait before trying again."},
+                {"x-amzn-ErrorType": "ThrottlingException:http://internal.amazon.com/coral/com.amazon.bedrock/"},
+            )
+            return
+
+        try:
+            request = json.loads(raw_body or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"message": "Malformed input request"}, {"x-amzn-ErrorType": "ValidationException"})
+            return
+        prompt = request.get("prompt", "")
+
+        if self.malformed and random.random() < cfg.malformed_rate:
+            self.stats.bump("malformed")
+            text = random.choice(self.malformed)
+        else:
+            text = canned_recipes(prompt)
+
+        max_tokens = int(request.get("max_gen_len") or request.get("max_tokens") or 512)
+        input_tokens = max(1, len(prompt) // 4)
+        output_tokens = max(1, -(-len(text) // 4))
+        if output_tokens > max_tokens:
+            # max_gen_len truncation, like the real model
+            output_tokens = max_tokens
+            text = text[: max_tokens * 4]
+
+        time.sleep(cfg.sample_latency())
+        if m.group(2) == "invoke":
+            time.sleep(output_tokens / cfg.tokens_per_sec)
+            self._send_json(
+                200,
+                {
+                    "generation": text,
+                    "prompt_token_count": input_tokens,
+                    "generation_token_count": output_tokens,
+                    "stop_reason": "length" if output_tokens >= max_tokens else "stop",
+                },
+                {
+                    "x-amzn-bedrock-input-token-count": str(input_tokens),
+                    "x-amzn-bedrock-output-token-count": str(output_tokens),
+                    "x-amzn-bedrock-invocation-latency": "0",
+                },
+            )
+            return
+
+        self.stats.bump("streams")
+        self._start_chunked("application/vnd.amazon.eventstream")
+        step = CHUNK_TOKENS * 4
+        for start in range(0, len(text), step):
+            piece = text[start:start + step]
+            last = start + step >= len(text)
+            chunk = {
+                "generation": piece,
+                "prompt_token_count": input_tokens if start == 0 else None,
+                "generation_token_count": min(output_tokens, (start + step) // 4),
+                "stop_reason": ("length" if output_tokens >= max_tokens else "stop") if last else None,
+            }
+            if last:
+                chunk["amazon-bedrock-invocationMetrics"] = {
+                    "inputTokenCount": input_tokens,
+                    "outputTokenCount": output_tokens,
+                }
+            event = encode_event(json.dumps({"bytes": base64.b64encode(json.dumps(chunk).encode()).decode()}).encode())
+            self._write_chunk(event)
+            time.sleep(CHUNK_TOKENS / cfg.tokens_per_sec)
+        self._end_chunked()
+
+
+def serve(config: argparse.Namespace):
+    """Starts the stand-in on a background thread and returns the server (call .shutdown() to stop)."""
+    stats = StubStats("requests", "throttled", "malformed", "streams")
+    return serve_stub(BedrockStubHandler, config, stats, malformed=load_malformed(config.corpus))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Local bedrock-runtime stand-in server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="lognormal:-1.0,0.5", help="time-to-first-token distribution (s)")
+    parser.add_argument("--tokens-per-sec", type=float, default=120.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="fraction answered from the corpus")
+    parser.add_argument("--corpus", default=CORPUS_FILE, help="JSONL of canned malformed outputs")
+    parser.add_argument("--verbose", action="store_true")
+    return parser
+
+
+def main():
+    config = build_parser().parse_args()
+    server = serve(config)
+    print(f"Bedrock stand-in listening on http://{config.host}:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# bench_diet_rules.py
+"""
+Times preprocess_ingredients (Aho-Corasick) against the previous nested-loop implementation,
+for the shipped rules and for a large synthetic blocklist.
+
+Usage: python bench_diet_rules.py [--rules 5000] [--items 2000]
+"""
+import argparse
+import random
+import re
+import time
+
+import diet_rules
+from diet_rules import normalize_ingredient_name, preprocess_ingredients
+
+
+def legacy_preprocess_ingredients(raw_ingredients: str, diet_key: str):
+    """The previous implementation: every item checked against every blocked term."""
+    items = [normalize_ingredient_name(i) for i in raw_ingredients.split(",") if i.strip()]
+    processed = []
+    replacements = []
+    rules = diet_rules.dietary_rules.get(diet_key, diet_rules.dietary_rules["none"])
+    blocked = set(rules["blocked"])
+    repl_map = rules["replacement"]
+
+    for it in items:
+        if it in blocked:
+            if it in repl_map:
+                processed.append(repl_map[it])
+                replacements.append((it, repl_map[it]))
+            else:
+                replacements.append((it, None))
+        else:
+            matched = False
+            for b in blocked:
+                if b in it:
+                    if b in repl_map:
+                        new_it = it.replace(b, repl_map[b])
+                        processed.append(new_it)
+                        replacements.append((it, new_it))
+                    else:
+                        new_it = re.sub(r"\b" + re.escape(b) + r"\b", "", it).strip()
+                        if new_it:
+                            processed.append(new_it)
+                        replacements.append((it, None))
+                    matched = True
+                    break
+            if not matched:
+                processed.append(it)
+
+    seen = set()
+    processed_unique = []
+    for p in processed:
+        if p not in seen:
+            seen.add(p)
+            processed_unique.append(p)
+    return ", ".join(processed_unique), replacements
+
+
+def timed(fn, *args, repeat: int = 5) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def synthetic_terms(n: int, rng: random.Random):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dietary rule matching.")
+    parser.add_argument("--rules", type=int, default=5000, help="synthetic blocked terms")
+    parser.add_argument("--items", type=int, default=2000, help="ingredients per list")
+    args = parser.parse_args()
+    rng = random.Random(3)
+
+    base = ["chicken breast", "eggs", "whole milk", "tomato", "garlic", "rice", "pasta", "honey", "basil"]
+    raw = ", ".join(rng.choice(base) for _ in range(args.items))
+
+    terms = synthetic_terms(args.rules, rng)
+    diet_rules.dietary_rules["bench"] = {
+        "blocked": terms,
+        "replacement": {t: f"{t} substitute" for t in terms[: args.rules // 2]},
+    }
+    diet_rules._compile_diet.cache_clear()
+    big_raw = ", ".join(f"{rng.choice(base)} {rng.choice(terms)}" for _ in range(args.items))
+
+    start = time.perf_counter()
+    diet_rules._compile_diet("bench")
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{'case':<36} {'legacy ms':>10} {'aho ms':>10}")
+    for name, text, diet in [
+        (f"vegan, {args.items} items", raw, "vegan"),
+        (f"{args.rules} rules, {args.items} items", big_raw, "bench"),
+    ]:
+        print(f"{name:<36} {timed(legacy_preprocess_ingredients, text, diet):>10.2f} {timed(preprocess_ingredients, text, diet):>10.2f}")
+    print(f"\ncompiling {args.rules} rules once (cached per diet): {compile_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# bench_json_extract.py
+"""
+Checks extract_json_array against the malformed-output corpus, fuzzes it with random
+truncations and stray brackets, and times it against the old regex extraction.
+
+Usage: python bench_json_extract.py [--iterations 2000] [--seed 7]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import time
+
+from json_extract import extract_json_array
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "fuzz_corpus.jsonl")
+
+
+def load_corpus(path: str = CORPUS_FILE):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def regex_extract(text: str):
+    """The previous approach: greedy regex over the whole response + trailing-comma retry."""
+    match = re.search(r"\[\s*\{.*\}\s*\]", text, re.DOTALL)
+    if not match:
+        return None
+    json_str = match.group(0)
+    try:
+        return json.loads(json_str)
+    except json.JSONDecodeError:
+        json_str = re.sub(r",\s*([\]}])", r"\1", json_str)
+        try:
+            return json.loads(json_str)
+        except json.JSONDecodeError:
+            return None
+
+
+def check_corpus(corpus):
+    failures = 0
+    for case in corpus:
+        got = extract_json_array(case["text"]) or []
+        old = regex_extract(case["text"]) or []
+        ok = len(got) == case["expected_recipes"]
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {case['name']:<28} new={len(got)} old={len(old)} expected={case['expected_recipes']}")
+    return failures
+
+
+def fuzz(corpus, iterations: int, rng: random.Random):
+    """Random cuts and bracket noise must never raise and never return non-dict items."""
+    noise = ["[", "]", "{", "}", '"', ",", "\n", "[Note]"]
+    for _ in range(iterations):
+        text = rng.choice(corpus)["text"]
+        if text and rng.random() < 0.5:
+            text = text[: rng.randrange(len(text))]
+        for _ in range(rng.randrange(3)):
+            at = rng.randrange(len(text) + 1)
+            text = text[:at] + rng.choice(noise) + text[at:]
+        result = extract_json_array(text)
+        assert result is None or all(isinstance(r, dict) for r in result), text
+
+
+def timed(fn, text: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(text)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def benchmark(corpus):
+    clean = next(c["text"] for c in corpus if c["name"] == "clean")
+    recipes = json.loads(clean)
+    big = json.dumps(recipes * 200, indent=2)
+    inputs = {
+        "clean (2 recipes)": clean,
+        "long prose + 400 recipes": ("Some notes [1] about {these} recipes. " * 500) + big + " [end]",
+        "long truncated output": big[: len(big) - 50],
+        "prose only, many brackets": "[a] {b} " * 20000,
+    }
+    print(f"\n{'input':<28} {'chars':>8} {'new ms':>9} {'old ms':>9}")
+    for name, text in inputs.items():
+        repeat = 200 if len(text) < 10_000 else 5
+        new_ms = timed(extract_json_array, text, repeat)
+        old_ms = timed(regex_extract, text, repeat)
+        print(f"{name:<28} {len(text):>8} {new_ms:>9.3f} {old_ms:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzz and benchmark the recipe JSON extractor.")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    failures = check_corpus(corpus)
+    fuzz(corpus, args.iterations, random.Random(args.seed))
+    print(f"\nfuzzed {args.iterations} mutated outputs without errors")
+    benchmark(corpus)
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# diet_rules.py
+import json
+import os
+from collections import deque
+from functools import lru_cache
+
+# -----------------------
+# Dietary rules & replacements
+# -----------------------
+RULES_FILE = os.environ.get(
+    "DIETARY_RULES_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "dietary_rules.json"),
+)
+
+# diet -> {"blocked": [...], "replacement": {blocked_term: replacement}}
+dietary_rules = {}
+
+
+def normalize_ingredient_name(s: str) -> str:
+    return s.strip().lower()
+
+
+def load_dietary_rules(path: str = RULES_FILE) -> dict:
+    """
+    Loads diet rules from a JSON file (same shape as `dietary_rules`) and recompiles lazily.
+    Terms listed only under "replacement" are treated as blocked too.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+
+    rules = {"none": {"blocked": [], "replacement": {}}}
+    for diet, spec in raw.items():
+        replacement = {
+            normalize_ingredient_name(k): v.strip()
+            for k, v in (spec.get("replacement") or {}).items()
+        }
+        blocked = [normalize_ingredient_name(b) for b in spec.get("blocked", []) if b.strip()]
+        blocked += [k for k in replacement if k not in blocked]
+        rules[normalize_ingredient_name(diet)] = {"blocked": blocked, "replacement": replacement}
+
+    # mutate in place so `from diet_rules import dietary_rules` stays current
+    dietary_rules.clear()
+    dietary_rules.update(rules)
+    _compile_diet.cache_clear()
+    return dietary_rules
+
+
+# -----------------------
+# Aho-Corasick matcher
+# -----------------------
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+
+class DietAutomaton:
+    """
+    Aho-Corasick automaton over one diet's blocked terms.
+    `find` returns leftmost-longest, non-overlapping whole-word matches in one pass over the text
+    (a trailing plural "s"/"es" counts as part of the word, so "eggs" matches "egg").
+    """
+
+    def __init__(self, terms):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]  # term lengths ending at each node, longest first
+        self._terms = [{}]  # length -> term, per node
+
+        for term in terms:
+            node = 0
+            for ch in term:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                    self._terms.append({})
+                node = nxt
+            self._terms[node][len(term)] = term
+            self._out[node] = (len(term),)
+
+        # breadth-first fail links; each node inherits the outputs of its fail node
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                fail = self._goto[f].get(ch, 0)
+                self._fail[nxt] = fail if fail != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+                self._terms[nxt] = {**self._terms[self._fail[nxt]], **self._terms[nxt]}
+                queue.append(nxt)
+
+    def find(self, text: str):
+        """Returns [(start, end, term)] for whole-word matches, leftmost-longest."""
+        n = len(text)
+        longest_at = [None] * n  # start -> (end, term)
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length in self._out[node]:
+                start = i + 1 - length
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                end = i + 1
+                for suffix in ("", "s", "es"):
+                    stop = end + len(suffix)
+                    if text.startswith(suffix, end) and (stop == n or not _is_word_char(text[stop])):
+                        best = longest_at[start]
+                        if best is None or best[0] < stop:
+                            longest_at[start] = (stop, self._terms[node][length])
+                        break
+
+        matches = []
+        pos = 0
+        for start, best in enumerate(longest_at):
+            if best is not None and start >= pos:
+                end, term = best
+                matches.append((start, end, term))
+                pos = end
+        return matches
+
+
+@lru_cache(maxsize=None)
+def _compile_diet(diet_key: str) -> DietAutomaton:
+    """
+    Compiles a diet's blocked terms plus its replacement phrases. The replacements act as
+    allow-list entries: longest-match priority keeps "soy milk" or "flax egg" intact instead of
+    matching the blocked "milk"/"egg" inside them.
+    """
+    rules = dietary_rules.get(diet_key, dietary_rules["none"])
+    allowed = {normalize_ingredient_name(v) for v in rules["replacement"].values()}
+    return DietAutomaton(list(dict.fromkeys(rules["blocked"] + sorted(allowed))))
+
+
+# -----------------------
+# Helpers
+# -----------------------
+def preprocess_ingredients(raw_ingredients: str, diet_key: str):
+    """Replace blocked ingredients automatically and return (cleaned_string, replacements_list)."""
+    items = [normalize_ingredient_name(i) for i in raw_ingredients.split(",") if i.strip()]
+    processed = []
+    replacements = []  # tuples (original, replaced)
+    rules = dietary_rules.get(diet_key, dietary_rules["none"])
+    blocked = set(rules["blocked"])
+    repl_map = rules["replacement"]
+    automaton = _compile_diet(diet_key)
+
+    for it in items:
+        matches = [m for m in automaton.find(it) if m[2] in blocked]
+        if not matches:
+            processed.append(it)
+            continue
+
+        # swap each blocked term for its replacement, or drop it if there is none
+        pieces = []
+        last = 0
+        dropped = False
+        for start, end, term in matches:
+            pieces.append(it[last:start])
+            if term in repl_map:
+                pieces.append(repl_map[term])
+            else:
+                dropped = True
+            last = end
+        pieces.append(it[last:])
+        new_it = " ".join("".join(pieces).split())
+
+        if new_it:
+            processed.append(new_it)
+        replacements.append((it, None if dropped else new_it))
+
+    # dedupe while preserving order
+    seen = set()
+    processed_unique = []
+    for p in processed:
+        if p not in seen:
+            seen.add(p)
+            processed_unique.append(p)
+
+    return ", ".join(processed_unique), replacements
+
+
+load_dietary_rules()
@@ -0,0 +1,197 @@
+# json_extract.py
+import json
+import re
+
+# -----------------------
+# Single-pass JSON array extraction
+# -----------------------
+_CLOSERS = {"]": "[", "}": "{"}
+_WHITESPACE = " \t\r\n"
+_STRING_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+# Next structural character outside / inside a string literal
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+_STRING_SPECIAL = re.compile(r'["\\\n\r\t]')
+# A '[' whose first element is an object
+_ARRAY_START = re.compile(r"\[\s*\{")
+# The first opening bracket of any JSON value
+_FIRST_BRACKET = re.compile(r"[\[{]")
+_decoder = json.JSONDecoder()
+
+
+def _drop_trailing_comma(out: list):
+    """Removes a ',' left dangling before a closing bracket (ignores whitespace)."""
+    if out:
+        tail = out[-1].rstrip(_WHITESPACE)
+        if tail.endswith(","):
+            out[-1] = tail[:-1]
+
+
+def _load_object(pieces: list):
+    try:
+        obj = json.loads("".join(pieces))
+    except json.JSONDecodeError:
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
+def _skip_whitespace(text: str, i: int) -> int:
+    while i < len(text) and text[i] in _WHITESPACE:
+        i += 1
+    return i
+
+
+def _decode_elements(text: str, start: int):
+    """
+    Decodes the array opening at text[start] one element at a time with raw_decode (C speed)
+    and stops at the first element that doesn't decode cleanly, e.g. the recipe cut off by
+    max_gen_len. A trailing comma before the closing ']' is accepted.
+    Returns (objects, complete, end_index); when not complete, end_index is just past the last
+    good element, where _scan_array can take over.
+    """
+    objects = []
+    resume = start + 1
+    i = _skip_whitespace(text, resume)
+    while i < len(text):
+        if text[i] == "]":
+            return objects, True, i
+        try:
+            obj, j = _decoder.raw_decode(text, i)
+        except json.JSONDecodeError:
+            break
+        if not isinstance(obj, dict):
+            break
+        objects.append(obj)
+        resume = j
+        i = _skip_whitespace(text, j)
+        if i < len(text) and text[i] == ",":
+            i = _skip_whitespace(text, i + 1)
+        elif i >= len(text) or text[i] != "]":
+            break
+    return objects, False, resume
+
+
+def _scan_array(text: str, start: int, resume: int = None):
+    """
+    Walks the array opening at text[start] exactly once, jumping between structural
+    characters and tracking strings and nesting. Every top-level object is parsed as soon
+    as its closing '}' is seen, after light repair (trailing commas dropped, raw
+    newlines/tabs inside strings escaped). With `resume`, the walk starts there instead,
+    inside the array (after the elements _decode_elements already returned).
+    Returns (objects, complete, end_index).
+    """
+    out = []
+    stack = [] if resume is None else ["["]
+    objects = []
+    obj_start = None
+    i = start if resume is None else resume
+    n = len(text)
+
+    while i < n:
+        m = _STRUCTURAL.search(text, i)
+        if m is None:
+            break
+        j = m.start()
+        if j > i:
+            out.append(text[i:j])
+        ch = text[j]
+        i = j + 1
+
+        if ch == '"':
+            # copy the string literal, escaping raw control characters
+            out.append(ch)
+            while True:
+                m = _STRING_SPECIAL.search(text, i)
+                if m is None:
+                    # ran out of text inside a string
+                    return objects, False, n
+                k = m.start()
+                if k > i:
+                    out.append(text[i:k])
+                special = text[k]
+                if special == '"':
+                    out.append(special)
+                    i = k + 1
+                    break
+                if special == "\\":
+                    out.append(text[k:k + 2])
+                    i = k + 2
+                else:
+                    out.append(_STRING_ESCAPES[special])
+                    i = k + 1
+        elif ch == "[" or ch == "{":
+            if ch == "{" and len(stack) == 1:
+                obj_start = len(out)
+            stack.append(ch)
+            out.append(ch)
+        else:
+            if not stack or stack[-1] != _CLOSERS[ch]:
+                # structural damage: keep what was already complete
+                return objects, False, j
+            _drop_trailing_comma(out)
+            stack.pop()
+            out.append(ch)
+            if ch == "}" and len(stack) == 1 and obj_start is not None:
+                obj = _load_object(out[obj_start:])
+                if obj is not None:
+                    objects.append(obj)
+                obj_start = None
+            if not stack:
+                return objects, True, j
+
+    # ran out of text (e.g. max_gen_len cut the last recipe)
+    return objects, False, n
+
+
+def extract_json_array(text: str):
+    """
+    Finds the JSON array of objects in model output and returns it as a list of dicts.
+    Prose, stray brackets and code fences around the array are ignored. If the output was
+    truncated or damaged, the complete objects before the damage are returned.
+    Returns [] when the output's top-level JSON value is an empty array (the model found no
+    recipes) and None when no object could be recovered.
+    """
+    if not text:
+        return None
+
+    stripped = text.strip()
+    if stripped.startswith("["):
+        try:
+            parsed = json.loads(stripped)
+            if isinstance(parsed, list) and all(isinstance(r, dict) for r in parsed):
+                return parsed
+        except json.JSONDecodeError:
+            pass
+
+    salvaged = None
+    m = _ARRAY_START.search(text)
+    while m:
+        pos = m.start()
+        # well-formed arrays decode at C speed; the scanner only runs on damaged ones
+        try:
+            parsed, _ = _decoder.raw_decode(text, pos)
+            if isinstance(parsed, list) and all(isinstance(r, dict) for r in parsed):
+                return parsed
+        except json.JSONDecodeError:
+            pass
+        # walk element by element; the char-level scanner only repairs from the first bad one
+        objects, complete, end = _decode_elements(text, pos)
+        if not complete:
+            repaired, complete, end = _scan_array(text, pos, resume=end)
+            objects += repaired
+        if objects:
+            if complete:
+                return objects
+            if salvaged is None or len(objects) > len(salvaged):
+                salvaged = objects
+        m = _ARRAY_START.search(text, max(end, pos + 1))
+
+    if salvaged is None:
+        # an inner [] (e.g. "ingredients": [] in a cut-off recipe) doesn't count
+        first = _FIRST_BRACKET.search(text)
+        if first and text[first.start()] == "[":
+            try:
+                if _decoder.raw_decode(text, first.start())[0] == []:
+                    return []
+            except json.JSONDecodeError:
+                pass
+    return salvaged
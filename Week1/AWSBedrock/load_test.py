@@ -0,0 +1,130 @@
+# load_test.py
+"""
+Open-loop load generator for the recipe app's code paths
+(preprocess_ingredients -> build_prompt -> call_bedrock -> parse_model_output).
+
+Requests are scheduled at a fixed --rps regardless of how slow earlier ones are, and latency is
+measured from each request's scheduled send time, not from when a worker picked it up, so time
+spent waiting for a free worker (--max-workers) counts too instead of being hidden (coordinated
+omission). Service time, from the worker starting to the result, is reported alongside. By default it starts the local stand-in (bedrock_stub.py)
+in-process; pass --endpoint-url to target a separately running one.
+
+Usage:
+    python load_test.py --rps 20 --duration 30 --mode parallel --throttle-rate 0.05
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import bedrock_stub
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from shared.batch import percentile
+
+INGREDIENT_POOL = ["chicken", "rice", "tomato", "garlic", "egg", "milk", "pasta", "spinach", "beef", "tofu", "onion"]
+DIETS = ["none", "vegan", "vegetarian", "pescatarian", "gluten-free"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the recipe generation path.")
+    parser.add_argument("--rps", type=float, default=10.0, help="target request starts per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of load")
+    parser.add_argument("--mode", choices=["single", "parallel"], default="single",
+                        help="one multi-recipe call, or the one-call-per-recipe fan-out")
+    parser.add_argument("--num-recipes", type=int, default=2)
+    parser.add_argument("--max-workers", type=int, default=64, help="cap on concurrently running requests")
+    parser.add_argument("--endpoint-url", default=None, help="use an already running stand-in")
+    # forwarded to the in-process stand-in
+    parser.add_argument("--latency", default="lognormal:-1.0,0.5")
+    parser.add_argument("--tokens-per-sec", type=float, default=120.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = None
+    endpoint = args.endpoint_url
+    if not endpoint:
+        stub_args = bedrock_stub.build_parser().parse_args([
+            "--port", "0",
+            "--latency", args.latency,
+            "--tokens-per-sec", str(args.tokens_per_sec),
+            "--throttle-rate", str(args.throttle_rate),
+            "--malformed-rate", str(args.malformed_rate),
+        ])
+        server = bedrock_stub.serve(stub_args)
+        endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # bedrock_helper reads its configuration at import time
+    os.environ["BEDROCK_ENDPOINT_URL"] = endpoint
+    os.environ.setdefault("BEDROCK_MAX_POOL", str(args.max_workers * max(1, args.num_recipes)))
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "stub")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "stub")
+    from bedrock_helper import call_bedrock, get_metrics
+    from diet_rules import preprocess_ingredients
+    from recipe_generator import build_prompt, iter_recipes_parallel, parse_model_output
+
+    latencies, service_times = [], []
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def one_request(scheduled: float):
+        ingredients = ", ".join(random.sample(INGREDIENT_POOL, random.randint(2, 5)))
+        diet = random.choice(DIETS)
+        started = time.perf_counter()
+        try:
+            cleaned, _ = preprocess_ingredients(ingredients, diet)
+            if args.mode == "parallel":
+                recipes = [r for _, r, _ in iter_recipes_parallel(
+                    call_bedrock, cleaned, args.num_recipes, diet, "Any", 2) if r]
+            else:
+                raw = call_bedrock(build_prompt(cleaned, args.num_recipes, diet, "Any", 2),
+                                   max_gen_len=800, temperature=0.28, top_p=0.9)
+                recipes = parse_model_output(raw)
+            outcome = "ok" if recipes else "parse_error"
+        except Exception as e:
+            response = getattr(e, "response", None)
+            code = response.get("Error", {}).get("Code") if isinstance(response, dict) else None
+            outcome = code or type(e).__name__
+        finished = time.perf_counter()
+        with lock:
+            latencies.append(finished - scheduled)
+            service_times.append(finished - started)
+            outcomes[outcome] += 1
+
+    total = int(args.rps * args.duration)
+    interval = 1.0 / args.rps
+    print(f"Driving {total} requests at {args.rps} rps against {endpoint} ({args.mode} mode)...", file=sys.stderr)
+    run_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.max_workers) as pool:
+        for i in range(total):
+            scheduled = run_started + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(one_request, scheduled)
+    elapsed = time.perf_counter() - run_started
+
+    done = sum(outcomes.values())
+    print(f"\nrequests: {done} in {elapsed:.1f}s  (achieved {done / elapsed:.1f} rps, target {args.rps})")
+    print(f"latency   p50 {percentile(latencies, 0.5):.3f}s  p90 {percentile(latencies, 0.9):.3f}s  "
+          f"p99 {percentile(latencies, 0.99):.3f}s  max {max(latencies, default=0):.3f}s  (from scheduled send)")
+    print(f"service   p50 {percentile(service_times, 0.5):.3f}s  p90 {percentile(service_times, 0.9):.3f}s  "
+          f"p99 {percentile(service_times, 0.99):.3f}s  max {max(service_times, default=0):.3f}s")
+    for outcome, count in outcomes.most_common():
+        print(f"  {outcome:<24} {count:>6}  ({count / done:.1%})")
+    m = get_metrics()
+    print(f"bedrock calls {m['calls']}, retries {m['retries']}, throttled after retries {m['throttles']}, "
+          f"peak in-flight {m['peak_in_flight']}")
+    if server:
+        print(f"stand-in saw {server.RequestHandlerClass.stats.counts}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# recipe_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from shared.cache_stats import CacheStats
+
+# -----------------------
+# Configuration
+# -----------------------
+CACHE_FILE = os.environ.get(
+    "RECIPE_CACHE_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipe_cache.sqlite3"),
+)
+CACHE_TTL_SECONDS = int(os.environ.get("RECIPE_CACHE_TTL", str(24 * 60 * 60)))
+# put() sweeps expired rows at most this often (the cache is also swept when opened)
+PURGE_INTERVAL_SECONDS = 60 * 60
+
+
+def canonical_ingredients(cleaned_ingredients: str):
+    """Order/case-insensitive form of preprocess_ingredients output."""
+    items = {i.strip().lower() for i in cleaned_ingredients.split(",") if i.strip()}
+    return sorted(items)
+
+
+def cache_key(cleaned_ingredients: str, **options) -> str:
+    """Stable key for (ingredient set, diet, difficulty, servings, num_recipes, model, ...)."""
+    payload = {"ingredients": canonical_ingredients(cleaned_ingredients), **options}
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class RecipeCache:
+    """
+    Persistent cache of already-parsed recipe lists, keyed by `cache_key`, with a TTL.
+    Also keeps hit/miss counters and how much generation time the hits saved.
+    Expired rows are deleted when the cache is opened and then at most every
+    PURGE_INTERVAL_SECONDS from put(), so keys that are never read again don't pile up.
+    """
+
+    def __init__(self, path: str = CACHE_FILE, ttl_seconds: int = CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS recipes (
+                       key TEXT PRIMARY KEY,
+                       recipes TEXT NOT NULL,
+                       created_at REAL NOT NULL,
+                       latency_s REAL NOT NULL
+                   )"""
+            )
+            self._stats = CacheStats(self._conn)
+        self.purge_expired()
+
+    def get(self, key: str):
+        """Returns the cached recipe list, or None on a miss / expired entry."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT recipes, created_at, latency_s FROM recipes WHERE key = ?", (key,)
+            ).fetchone()
+            if row and time.time() - row[1] <= self.ttl_seconds:
+                self._stats.bump("hits")
+                self._stats.bump("saved_s", row[2])
+                return json.loads(row[0])
+            if row:
+                self._conn.execute("DELETE FROM recipes WHERE key = ?", (key,))
+            self._stats.bump("misses")
+            return None
+
+    def put(self, key: str, recipes: list, latency_s: float):
+        """Stores a parsed recipe list along with the time it took to generate."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO recipes (key, recipes, created_at, latency_s) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(recipes, ensure_ascii=False), now, latency_s),
+            )
+            if now - self._last_purge >= PURGE_INTERVAL_SECONDS:
+                self._purge(now)
+
+    def _purge(self, now: float) -> int:
+        self._last_purge = now
+        cur = self._conn.execute("DELETE FROM recipes WHERE created_at < ?", (now - self.ttl_seconds,))
+        return cur.rowcount
+
+    def purge_expired(self) -> int:
+        """Deletes every expired entry; returns how many were removed."""
+        with self._lock, self._conn:
+            return self._purge(time.time())
+
+    def stats(self) -> dict:
+        """{"hits", "misses", "hit_rate", "saved_s", "entries"}"""
+        with self._lock:
+            summary = self._stats.summary()
+            summary["entries"] = self._conn.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+        return summary
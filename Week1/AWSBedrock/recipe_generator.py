@@ -0,0 +1,140 @@
+# recipe_generator.py
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from json_extract import extract_json_array
+
+# One distinct direction per parallel call so concurrent recipes don't collapse into duplicates
+RECIPE_STYLE_HINTS = [
+    "a quick one-pan or stir-fry dish",
+    "a soup, stew or curry",
+    "a fresh salad or grain bowl",
+    "a baked or roasted dish",
+    "a snack, wrap or handheld dish",
+]
+
+# Token budget for a single-recipe call (the multi-recipe call uses 800 for all of them)
+SINGLE_RECIPE_MAX_GEN_LEN = 450
+
+RECIPE_SCHEMA = """{
+    "title": "string",
+    "servings": integer,
+    "ingredients": ["string", "string"],
+    "steps": ["string", "string"],
+    "difficulty": "Easy" | "Medium" | "Hard",
+    "estimated_time": "string (e.g., '25 minutes')",
+    "notes": "string"
+  }"""
+
+
+# -----------------------
+# Prompts
+# -----------------------
+def _constraints(diet: str, difficulty: str, servings: int) -> str:
+    diet_wording = diet if diet != "none" else "no dietary restriction"
+    difficulty_text = difficulty if difficulty != "Any" else "Any difficulty"
+    return f"""Constraints:
+- Diet: {diet_wording}. STRICTLY follow this; do NOT include disallowed ingredients.
+- Difficulty: {difficulty_text}.
+- Servings: approximately {servings} per recipe.
+- Use ONLY the provided ingredients (and common pantry items like salt, pepper, oil, water, sugar). Do NOT invent rare ingredients.
+- If any provided ingredient was automatically replaced, mention the replacement in the "notes" field for that recipe."""
+
+
+def build_prompt(ingredients: str, num_recipes: int, diet: str, difficulty: str, servings: int):
+    """
+    Ask model for a JSON array of recipe objects. Each object:
+    { "title", "servings", "ingredients": [...], "steps": [...], "difficulty", "estimated_time", "notes" }
+    """
+    prompt = f"""
+You are a helpful, precise recipe generator.
+
+{_constraints(diet, difficulty, servings)}
+
+Task:
+JSON Schema:
+[
+  {RECIPE_SCHEMA}
+]
+
+Now generate exactly {num_recipes} recipes using only:
+{ingredients}
+
+Your entire response must be a single JSON array following the schema above, starting with '[' and ending with ']'.
+"""
+    return prompt.strip()
+
+
+def build_recipe_prompt(ingredients: str, diet: str, difficulty: str, servings: int, style_hint: str):
+    """Same contract as build_prompt, but for exactly one recipe steered by `style_hint`."""
+    prompt = f"""
+You are a helpful, precise recipe generator.
+
+{_constraints(diet, difficulty, servings)}
+- Make it {style_hint}, and give it a title that reflects that.
+
+Task:
+JSON Schema:
+[
+  {RECIPE_SCHEMA}
+]
+
+Now generate exactly 1 recipe using only:
+{ingredients}
+
+Your entire response must be a single JSON array following the schema above, starting with '[' and ending with ']'.
+"""
+    return prompt.strip()
+
+
+# -----------------------
+# Parsing
+# -----------------------
+def parse_model_output(raw_text: str):
+    """
+    Extracts and parses a JSON array of recipes from model output text.
+    Truncated output still yields the recipes that were completed.
+    """
+    return extract_json_array(raw_text)
+
+
+# -----------------------
+# Parallel fan-out
+# -----------------------
+def iter_recipes_parallel(call_fn, ingredients: str, num_recipes: int, diet: str, difficulty: str,
+                          servings: int, temperature: float = 0.28, top_p: float = 0.9, max_workers: int = None):
+    """
+    Issues one small `call_fn(prompt, max_gen_len=..., temperature=..., top_p=...)` per recipe
+    concurrently and yields (slot, recipe_or_None, raw_text) as each call finishes.
+    A failed or unparseable call only loses its own slot. Recipes whose title repeats an
+    earlier one are yielded as None so the caller can drop them.
+    """
+    hints = [RECIPE_STYLE_HINTS[i % len(RECIPE_STYLE_HINTS)] for i in range(num_recipes)]
+    seen_titles = set()
+
+    with ThreadPoolExecutor(max_workers=max_workers or num_recipes) as pool:
+        futures = {
+            pool.submit(
+                call_fn,
+                build_recipe_prompt(ingredients, diet, difficulty, servings, hint),
+                max_gen_len=SINGLE_RECIPE_MAX_GEN_LEN,
+                temperature=temperature,
+                top_p=top_p,
+            ): slot
+            for slot, hint in enumerate(hints)
+        }
+        for future in as_completed(futures):
+            slot = futures[future]
+            try:
+                raw = future.result()
+            except Exception as e:
+                yield slot, None, f"Error: {e}"
+                continue
+
+            parsed = parse_model_output(raw)
+            recipe = parsed[0] if parsed else None
+            if recipe is not None:
+                title = str(recipe.get("title", "")).strip().lower()
+                if title and title in seen_titles:
+                    recipe = None
+                seen_titles.add(title)
+            yield slot, recipe, raw
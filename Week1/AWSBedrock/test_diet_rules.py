@@ -0,0 +1,25 @@
+# test_diet_rules.py
+from diet_rules import preprocess_ingredients
+
+
+def test_whole_phrase_is_replaced_once():
+    cleaned, replacements = preprocess_ingredients("whole wheat pasta, tomato", "gluten-free")
+    assert cleaned == "gluten-free pasta, tomato"
+    assert replacements == [("whole wheat pasta", "gluten-free pasta")]
+
+
+def test_longest_phrase_wins_over_its_words():
+    cleaned, _ = preprocess_ingredients("Wheat Flour, whole wheat bread, wheat", "gluten-free")
+    assert cleaned == "gluten-free flour, gluten-free bread"
+
+
+def test_replacement_phrases_are_left_alone():
+    cleaned, replacements = preprocess_ingredients("soy milk, flax eggs, milk", "vegan")
+    assert cleaned == "soy milk, flax eggs"
+    assert replacements == [("milk", "soy milk")]
+
+
+def test_blocked_word_inside_another_word_is_kept():
+    cleaned, replacements = preprocess_ingredients("buckwheat, eggplant", "vegan")
+    assert cleaned == "buckwheat, eggplant"
+    assert replacements == []
@@ -0,0 +1,36 @@
+# test_json_extract.py
+from json_extract import extract_json_array
+
+
+def test_empty_array_returns_empty_list():
+    assert extract_json_array("[]") == []
+    assert extract_json_array("  [ ]\n") == []
+    assert extract_json_array("```json\n[]\n```") == []
+    assert extract_json_array("No recipes match those ingredients: []") == []
+
+
+def test_no_array_returns_none():
+    assert extract_json_array("") is None
+    assert extract_json_array("Sorry, I can't help with that.") is None
+    assert extract_json_array('{"title": "Soup"}') is None
+
+
+def test_recipes_are_preferred_over_an_empty_array():
+    text = 'Ignore this [] -- here you go: [{"title": "Soup"}, {"title": "Salad"}]'
+    assert extract_json_array(text) == [{"title": "Soup"}, {"title": "Salad"}]
+
+
+def test_truncated_array_keeps_complete_objects():
+    text = '[{"title": "Soup"}, {"title": "Sal'
+    assert extract_json_array(text) == [{"title": "Soup"}]
+
+
+def test_inner_empty_array_in_truncated_output_is_not_an_empty_result():
+    text = '[{"title": "Soup", "ingredients": [], "steps": ["boil'
+    assert extract_json_array(text) is None
+    assert extract_json_array('Here you go: {"recipes": []}') is None
+
+
+def test_damaged_element_is_repaired_after_clean_ones():
+    text = '[{"title": "Soup"},\n{"title": "Salad", "notes": "raw\nnewline"}, {"title": "Stew"},]'
+    assert [r["title"] for r in extract_json_array(text)] == ["Soup", "Salad", "Stew"]
@@ -1,14 +1,23 @@
 import streamlit as st
-from groq import Groq
 from dotenv import load_dotenv
 import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from shared.context_window import ContextWindow
+from shared.groq_client import format_stats, get_client
+from shared.telemetry import track
 
 # Load environment variables
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
-# Initialize Groq client
-client = Groq(api_key=GROQ_API_KEY)
+# Shared Groq client (one connection pool per process, reused across reruns)
+client = get_client(GROQ_API_KEY)
+
+CONTEXT_TOKENS = 6000  # prompt budget per request (the llama3 models have an 8192-token window)
+HISTORY_WINDOW = 30  # messages rendered per page of chat history
 
 # Streamlit page setup
 st.set_page_config(page_title="Groq Chatbot", page_icon="💬", layout="wide")
@@ -24,6 +33,7 @@ model_choice = st.sidebar.selectbox(
     ["llama3-8b-8192", "llama3-70b-8192"],
     index=0
 )
+st.sidebar.caption(format_stats())
 
 # Session state for chat history
 if "messages" not in st.session_state:
@@ -31,12 +41,34 @@ if "messages" not in st.session_state:
         {"role": "system", "content": "You are a helpful assistant."}
     ]
 
-# Display chat history with avatars
-for msg in st.session_state.messages:
-    if msg["role"] != "system":  # Skip system prompt
-        avatar = "👤" if msg["role"] == "user" else "🤖"
-        with st.chat_message(msg["role"], avatar=avatar):
-            st.markdown(msg["content"])
+# Older turns are folded into a rolling summary so the prompt stays under CONTEXT_TOKENS
+def summarize(prompt):
+    with track("rainbows/summary", "llama3-8b-8192") as call:
+        response = client.chat.completions.create(
+            model="llama3-8b-8192",
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=400,
+            temperature=0.2,
+        )
+        call.usage_from(response.usage)
+    return response.choices[0].message.content
+
+if "context_window" not in st.session_state:
+    st.session_state.context_window = ContextWindow(summarize, max_prompt_tokens=CONTEXT_TOKENS)
+
+# Display chat history with avatars (only the last HISTORY_WINDOW messages, paging back on demand)
+visible = [msg for msg in st.session_state.messages if msg["role"] != "system"]  # Skip system prompt
+window = st.session_state.setdefault("history_window", HISTORY_WINDOW)
+hidden = max(0, len(visible) - window)
+if hidden and st.button(f"⬆ Load earlier messages ({hidden} more)"):
+    st.session_state.history_window = window + HISTORY_WINDOW
+    st.rerun()
+for msg in visible[hidden:]:
+    avatar = "👤" if msg["role"] == "user" else "🤖"
+    with st.chat_message(msg["role"], avatar=avatar):
+        st.markdown(msg["content"])
+        if msg.get("truncated"):
+            st.caption("⏹ Stopped early")
 
 # Chat input
 if prompt := st.chat_input("Type your message here..."):
@@ -47,15 +79,44 @@ if prompt := st.chat_input("Type your message here..."):
     with st.chat_message("user", avatar="👤"):
         st.markdown(prompt)
 
-    # Generate assistant reply
+    # Generate assistant reply (streamed; Stop reruns the script, which interrupts this loop)
+    stop_slot = st.empty()
+    stop_slot.button("⏹ Stop generating")
     with st.chat_message("assistant", avatar="🤖"):
-        with st.spinner("Thinking..."):
-            response = client.chat.completions.create(
+        request_messages, budget = st.session_state.context_window.build(st.session_state.messages)
+        placeholder = st.empty()
+        answer = ""
+        with track("rainbows/chat", model_choice, stream=True) as call:
+            stream = client.chat.completions.create(
                 model=model_choice,
-                messages=st.session_state.messages
+                messages=request_messages,
+                stream=True,
             )
-            answer = response.choices[0].message.content
-            st.markdown(answer)
+            try:
+                for chunk in stream:
+                    # Groq sends token usage on the last chunk
+                    call.usage_from(getattr(getattr(chunk, "x_groq", None), "usage", None))
+                    token = chunk.choices[0].delta.content if chunk.choices else None
+                    if token:
+                        call.token()
+                        answer += token
+                        placeholder.markdown(answer + "▌")
+            except Exception:
+                stream.close()
+                raise
+            except BaseException:
+                # stopped: close the connection so generation ends upstream, keep the partial answer
+                call.cancelled = True
+                stream.close()
+                if answer:
+                    st.session_state.messages.append({"role": "assistant", "content": answer, "truncated": True})
+                raise
+        placeholder.markdown(answer)
+        st.caption(
+            f"Context {budget['prompt_tokens']}/{budget['limit']} tokens "
+            f"({budget['sent_turns']} recent messages, {budget['summarized_turns']} summarized)"
+        )
+    stop_slot.empty()
 
     # Save assistant response
     st.session_state.messages.append({"role": "assistant", "content": answer})
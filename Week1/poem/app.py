@@ -1,11 +1,16 @@
 import streamlit as st
-import requests
 from PIL import Image
 from io import BytesIO
 import base64
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from shared.groq_client import format_stats, get_session, groq_api_url, request_timeout
+from shared.telemetry import track
+
 # Load environment variables
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -152,7 +157,7 @@ if st.button("✨ Generate"):
         st.warning("Please enter a topic.")
     else:
         with st.spinner("Generating poem..."):
-            groq_url = "https://api.groq.com/openai/v1/chat/completions"
+            groq_url = f"{groq_api_url()}/chat/completions"
             headers = {"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"}
             data = {
                 "model": POEM_MODEL,
@@ -162,7 +167,12 @@ if st.button("✨ Generate"):
                 ],
                 "temperature": 0.8
             }
-            response = requests.post(groq_url, headers=headers, json=data)
+            with track("poem", POEM_MODEL) as call:
+                response = get_session().post(groq_url, headers=headers, json=data, timeout=request_timeout())
+                if response.status_code == 200:
+                    call.usage_from(response.json().get("usage"))
+                else:
+                    call.error = f"HTTP {response.status_code}"
             if response.status_code == 200:
                 poem = response.json()["choices"][0]["message"]["content"]
             else:
@@ -173,7 +183,10 @@ if st.button("✨ Generate"):
                 hf_url = f"https://api-inference.huggingface.co/models/{IMAGE_MODEL}"
                 headers = {"Authorization": f"Bearer {HF_API_KEY}"}
                 payload = {"inputs": f"An artistic, detailed illustration for: {topic}"}
-                img_response = requests.post(hf_url, headers=headers, json=payload)
+                with track("poem/image", IMAGE_MODEL) as call:
+                    img_response = get_session().post(hf_url, headers=headers, json=payload, timeout=request_timeout())
+                    if img_response.status_code != 200:
+                        call.error = f"HTTP {img_response.status_code}"
 
                 if img_response.status_code == 200:
                     image = Image.open(BytesIO(img_response.content))
@@ -207,3 +220,5 @@ if poem and img_base64:
             """,
             unsafe_allow_html=True
         )
+
+st.caption(format_stats())
@@ -1,6 +1,8 @@
 # rag_ui.py
 import os
+import sys
 import tempfile
+from pathlib import Path
 import streamlit as st
 from dotenv import load_dotenv
 from langchain_community.document_loaders import PyPDFLoader, TextLoader
@@ -9,6 +11,9 @@ from langchain_community.vectorstores import FAISS
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_groq import ChatGroq
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from shared.telemetry import track
+
 # -------------------------
 # Config & API keys
 # -------------------------
@@ -129,7 +134,9 @@ def answer_question(query, db, style="Concise"):
     """
 
     llm = ChatGroq(groq_api_key=GROQ_API_KEY, model_name="llama3-8b-8192")
-    response = llm.invoke(prompt)
+    with track("rag_ui", "llama3-8b-8192") as call:
+        response = llm.invoke(prompt)
+        call.usage_from((getattr(response, "response_metadata", None) or {}).get("token_usage"))
     return response.content, docs
 
 # -------------------------
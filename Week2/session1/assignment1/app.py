@@ -1,81 +1,51 @@
-import os
+import sys
 import json
-import requests
+import time
+import hashlib
 import pandas as pd
 import streamlit as st
-from dotenv import load_dotenv
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from shared.batch import load_results
+from shared.groq_client import format_stats
+from shared.stream_render import StreamRenderer
+from pitch_generator import (
+    DEADLINE_S, FEW_SHOT_K, FEW_SHOT_MAX_TOKENS, GROQ_API_KEY, GROQ_MODEL, ZERO_SHOT_TEMPLATE, few_shot_prompt,
+    run_concurrently,
+)
+from example_bank import add_example, get_example_bank
+from batch_eval import (
+    DEFAULT_RPS, RESULT_COLUMNS, STRATEGIES, build_report, normalize_row, run_batch,
+)
 
-# -----------------------
-# Env & Config
-# -----------------------
-load_dotenv()
-GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
-GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
-GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
+BATCH_DIR = Path(__file__).resolve().parent / "batch_runs"  # one checkpoint file per dataset + settings
 
 if not GROQ_API_KEY:
     st.warning("Set GROQ_API_KEY in your .env file before using the app.")
 
 # -----------------------
-# Prompt templates
+# Display helpers
 # -----------------------
-ZERO_SHOT_TEMPLATE = """Given a short movie idea, create a catchy one-sentence movie pitch suitable for a poster.
-Keep it to one sentence.
-
-Idea: "{idea}"
-"""
-
-FEW_SHOT_TEMPLATE = """Given a short movie idea, create a catchy one-sentence movie pitch suitable for a poster.
-Keep it to one sentence.
-
-Example 1:
-Idea: "A chef who can taste people's emotions in food."
-Pitch: "A gifted chef discovers the bittersweet truth hidden in every bite — and every heart."
-
-Example 2:
-Idea: "A shy teenager finds a pair of magical shoes."
-Pitch: "One step at a time, she dances her way into a world she never dreamed was hers."
-
-Example 3:
-Idea: "A scientist builds a time machine out of a photo booth."
-Pitch: "Every snapshot takes them deeper into the past — and closer to rewriting the future."
-
-Now create a pitch for this idea:
-"{idea}"
-"""
+def pitch_card(text: str) -> str:
+    return f"""
+            <div style="
+                background-color:#f9f9f9;
+                padding:15px;
+                border-radius:12px;
+                box-shadow:0 2px 6px rgba(0,0,0,0.1);
+                font-size:16px;
+            ">
+                {text}
+            </div>
+            """
 
-# -----------------------
-# Groq Chat helper
-# -----------------------
-def groq_chat(prompt: str, temperature: float = 0.7, max_tokens: int = 128) -> str:
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "model": GROQ_MODEL,
-        "messages": [
-            {"role": "system", "content": "Return only the final pitch without extra commentary."},
-            {"role": "user", "content": prompt},
-        ],
-        "temperature": float(temperature),
-        "max_completion_tokens": int(max_tokens)  # ✅ Correct param for Groq
-    }
-
-    try:
-        resp = requests.post(GROQ_URL, headers=headers, data=json.dumps(payload), timeout=60)
-        resp.raise_for_status()
-        data = resp.json()
-        return data["choices"][0]["message"]["content"].strip()
-    except requests.exceptions.HTTPError as http_err:
-        try:
-            err_data = resp.json()
-            err_msg = err_data.get("error", {}).get("message", str(http_err))
-        except Exception:
-            err_msg = str(http_err)
-        raise RuntimeError(f"Groq API Error: {err_msg}")
-    except requests.exceptions.RequestException as req_err:
-        raise RuntimeError(f"Request Error: {req_err}")
+def usage_caption(result: dict) -> str:
+    parts = [f"⏱ {result['latency_s']:.2f}s"]
+    if result.get("ttft_s") is not None:
+        parts.append(f"first token {result['ttft_s']:.2f}s")
+    parts.append(f"{result.get('prompt_tokens') or '?'} prompt + {result.get('completion_tokens') or '?'} completion tokens")
+    return " · ".join(parts)
 
 # -----------------------
 # Streamlit UI
@@ -93,12 +63,19 @@ st.markdown(
 st.caption("Compare outputs instantly ")
 
 with st.sidebar:
+    mode = st.radio("Mode", ["Single idea", "Batch evaluation"], horizontal=True)
     st.subheader("Model & Parameters")
     st.text_input("Groq Model", value=GROQ_MODEL, key="model", help="Set in .env as GROQ_MODEL")
     temperature = st.slider("Temperature", 0.0, 1.5, 0.7, 0.1)
     max_tokens = st.slider("Max tokens", 32, 512, 128, 16)
+    stream_tokens = st.checkbox("Stream tokens", value=True, help="Show each pitch as it is generated")
+    st.subheader("Few-shot Examples")
+    few_shot_k = st.slider("Examples per prompt (most similar first)", 1, 6, FEW_SHOT_K)
+    few_shot_cap = st.slider("Few-shot prompt token cap", 100, 800, FEW_SHOT_MAX_TOKENS, 25)
+    st.caption(f"Example bank: {len(get_example_bank().examples)} examples")
     st.markdown("---")
     st.markdown("**Tip:** One click runs both prompts for instant comparison.")
+    st.caption(format_stats())
 
 # -----------------------
 # Session state
@@ -107,6 +84,82 @@ if "zero_out" not in st.session_state:
     st.session_state.zero_out = ""
 if "few_out" not in st.session_state:
     st.session_state.few_out = ""
+if "pitch_stats" not in st.session_state:
+    st.session_state.pitch_stats = {}  # "zero"/"few" -> latency & token usage of the last run
+if "few_examples" not in st.session_state:
+    st.session_state.few_examples = []  # (similarity, example) pairs the last few-shot prompt used
+
+# -----------------------
+# Batch evaluation
+# -----------------------
+if mode == "Batch evaluation":
+    st.markdown("### 📊 Batch Evaluation")
+    st.caption("Runs both prompts over every idea in a CSV. Progress is saved as it goes: "
+               "re-running the same file resumes where it stopped and retries failed rows.")
+    uploaded = st.file_uploader("CSV of movie ideas (an `idea` column, or ideas in the first column)", type=["csv"])
+    b1, b2 = st.columns(2)
+    concurrency = b1.slider("Ideas in flight", 1, 16, 4)
+    rps = b2.slider("Max requests / second (0 = no limit)", 0.0, 30.0, float(DEFAULT_RPS), 0.5)
+    if uploaded is None:
+        st.stop()
+
+    data = uploaded.getvalue()
+    df = pd.read_csv(uploaded)
+    columns = list(df.columns)
+    idea_col = st.selectbox("Idea column", columns, index=columns.index("idea") if "idea" in columns else 0)
+    rows = [{"idea": row.get(idea_col), "id": row.get("id") if pd.notna(row.get("id")) else None}
+            for row in df.to_dict("records")]
+    ids = list(dict.fromkeys(job["id"] for job in map(normalize_row, rows) if job))
+
+    # one checkpoint per dataset *and* generation settings, so changing a slider starts a fresh run
+    # instead of resuming from (and appending to) results produced under other settings
+    few_shot = {"k": few_shot_k, "max_prompt_tokens": few_shot_cap}
+    settings = json.dumps({"idea_col": idea_col, "model": GROQ_MODEL, "temperature": temperature,
+                           "max_tokens": max_tokens, "few_shot": few_shot}, sort_keys=True)
+    BATCH_DIR.mkdir(exist_ok=True)
+    out_path = str(BATCH_DIR / f"{hashlib.sha1(data + settings.encode()).hexdigest()[:12]}.jsonl")
+    results = load_results(out_path)
+    done = sum(results.get(i, {}).get("status") == "ok" for i in ids)
+    st.write(f"**{len(ids)}** distinct ideas · **{done}** already evaluated")
+
+    table = st.empty()
+    progress = st.empty()
+
+    def show_table():
+        records = [results[i] for i in ids if i in results]
+        table.dataframe(pd.DataFrame(records, columns=RESULT_COLUMNS), use_container_width=True)
+        return records
+
+    if st.button("Run batch" if not done else "Resume batch", disabled=done == len(ids) or not GROQ_API_KEY):
+        bar = progress.progress(done / len(ids) if ids else 1.0)
+        last_draw = 0.0
+        for record in run_batch(rows, out_path, concurrency, rps, temperature=temperature, max_tokens=max_tokens,
+                                few_shot=few_shot):
+            results[record["id"]] = record
+            done += record["status"] == "ok"
+            # redraw at most a few times a second; every record is already on disk
+            if time.perf_counter() - last_draw > 0.5:
+                bar.progress(min(1.0, done / len(ids)), text=f"{done}/{len(ids)} ideas evaluated")
+                show_table()
+                last_draw = time.perf_counter()
+        bar.progress(min(1.0, done / len(ids)), text=f"{done}/{len(ids)} ideas evaluated")
+
+    records = show_table()
+    if records:
+        report = build_report(records)
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Rows evaluated", report["ok"])
+        m2.metric("Rows with errors", report["errors"])
+        if report["zero"]["avg_prompt_tokens"]:
+            m3.metric("Few-shot prompt tokens", f"{report['few']['avg_prompt_tokens'] / report['zero']['avg_prompt_tokens']:.1f}× zero-shot")
+        st.dataframe(pd.DataFrame({name: report[name] for name in STRATEGIES}), use_container_width=True)
+        st.download_button(
+            "⬇ Download results (CSV)",
+            pd.DataFrame(records, columns=RESULT_COLUMNS).to_csv(index=False).encode("utf-8"),
+            file_name=f"pitch_eval_{Path(uploaded.name).stem}.csv",
+            mime="text/csv",
+        )
+    st.stop()
 
 # -----------------------
 # Single Idea Test
@@ -117,55 +170,79 @@ idea = st.text_input(
     value="A librarian finds a book that writes back."
 )
 
-if st.button("Generate Both Outputs"):
+generate = st.button("Generate Both Outputs")
+
+col1, col2 = st.columns(2)
+outputs = {"zero": ("zero_out", col1, "### 🎯 Zero-shot Output"), "few": ("few_out", col2, "### 🎬 Few-shot Output")}
+slots = {}
+for label, (key, col, heading) in outputs.items():
+    with col:
+        title, card, caption = st.empty(), st.empty(), st.empty()
+    slots[label] = (title, card, caption)
+
+if generate:
     if not GROQ_API_KEY:
         st.error("Missing GROQ_API_KEY. Set it in your .env.")
     else:
-        try:
-            z_prompt = ZERO_SHOT_TEMPLATE.format(idea=idea)
-            f_prompt = FEW_SHOT_TEMPLATE.format(idea=idea)
-            st.session_state.zero_out = groq_chat(z_prompt, temperature=temperature, max_tokens=max_tokens)
-            st.session_state.few_out = groq_chat(f_prompt, temperature=temperature, max_tokens=max_tokens)
-            st.success("Both outputs generated!")
-        except Exception as e:
-            st.error(str(e))
-
-col1, col2 = st.columns(2)
-
-with col1:
-    if st.session_state.zero_out:   # ✅ Show only if generated
-        st.markdown("### 🎯 Zero-shot Output")
-        st.markdown(
-            f"""
-            <div style="
-                background-color:#f9f9f9;
-                padding:15px;
-                border-radius:12px;
-                box-shadow:0 2px 6px rgba(0,0,0,0.1);
-                font-size:16px;
-            ">
-                {st.session_state.zero_out}
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
-
-with col2:
-    if st.session_state.few_out:    # ✅ Show only if generated
-        st.markdown("### 🎬 Few-shot Output")
-        st.markdown(
-            f"""
-            <div style="
-                background-color:#f9f9f9;
-                padding:15px;
-                border-radius:12px;
-                box-shadow:0 2px 6px rgba(0,0,0,0.1);
-                font-size:16px;
-            ">
-                {st.session_state.few_out}
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
-
-
+        # both prompts go out together; each column fills in as its own reply arrives
+        few_prompt, st.session_state.few_examples = few_shot_prompt(idea, few_shot_k, few_shot_cap)
+        st.session_state.pitch_idea = idea
+        st.session_state.pitch_saved = False
+        prompts = {"zero": ZERO_SHOT_TEMPLATE.format(idea=idea), "few": few_prompt}
+        # tokens are coalesced into frames: each frame re-sends the whole card
+        renderers = {label: StreamRenderer(slots[label][1], lambda text: pitch_card(text + "▌")) for label in prompts}
+        errors = []
+        st.session_state.pitch_stats = {}
+        started = time.perf_counter()
+        for label, (key, _, heading) in outputs.items():
+            st.session_state[key] = ""
+            slots[label][0].markdown(heading)
+        for label, kind, value in run_concurrently(prompts, temperature, max_tokens, stream_tokens):
+            title, card, caption = slots[label]
+            if kind == "token":
+                renderers[label].push(value)
+            elif kind == "done":
+                st.session_state[outputs[label][0]] = value["text"]
+                st.session_state.pitch_stats[label] = value
+                card.markdown(pitch_card(value["text"]), unsafe_allow_html=True)
+                caption.caption(usage_caption(value))
+            elif kind == "error":
+                card.empty()
+                errors.append(value)
+            else:
+                if renderers[label].text:
+                    card.markdown(pitch_card(renderers[label].text), unsafe_allow_html=True)
+                caption.warning(f"Stopped after {DEADLINE_S:.0f}s without finishing.")
+        wall = time.perf_counter() - started
+
+        for message in dict.fromkeys(errors):
+            st.error(message)
+        if len(st.session_state.pitch_stats) == len(prompts):
+            sequential = sum(r["latency_s"] for r in st.session_state.pitch_stats.values())
+            st.success(f"Both outputs generated in {wall:.2f}s (one after the other would take ~{sequential:.2f}s)")
+
+# Show the last results (a fresh run has already drawn its own)
+if not generate:
+    for label, (key, _, heading) in outputs.items():
+        if st.session_state[key]:   # ✅ Show only if generated
+            title, card, caption = slots[label]
+            title.markdown(heading)
+            card.markdown(pitch_card(st.session_state[key]), unsafe_allow_html=True)
+            if label in st.session_state.pitch_stats:
+                caption.caption(usage_caption(st.session_state.pitch_stats[label]))
+
+stats = st.session_state.pitch_stats
+if "zero" in stats and "few" in stats and stats["zero"].get("prompt_tokens") and stats["few"].get("prompt_tokens"):
+    extra = stats["few"]["prompt_tokens"] - stats["zero"]["prompt_tokens"]
+    st.caption(f"Few-shot examples cost {extra} extra prompt tokens per call "
+               f"({stats['few']['prompt_tokens'] / stats['zero']['prompt_tokens']:.1f}× the zero-shot prompt).")
+
+# The bank examples picked for this idea, and a way to grow the bank with a good pitch
+if st.session_state.few_out and st.session_state.few_examples:
+    with col2.expander(f"Few-shot examples used ({len(st.session_state.few_examples)})"):
+        for score, example in st.session_state.few_examples:
+            st.markdown(f"**{score:.2f}** · _{example['idea']}_ → {example['pitch']}")
+    if not st.session_state.get("pitch_saved") and col2.button("⭐ Add this pitch to the example bank"):
+        add_example(st.session_state.pitch_idea, st.session_state.few_out)
+        st.session_state.pitch_saved = True
+        col2.success("Added. Similar ideas will now get it as an example.")
@@ -0,0 +1,187 @@
+# batch_eval.py
+"""
+Batch evaluation of the zero-shot and (similarity-selected) few-shot pitch prompts over a
+dataset of movie ideas.
+
+Every row is run through both prompts with bounded concurrency (rows in flight) and a
+token-bucket limit on requests/second. One JSON line per row is appended to the output file as
+soon as it finishes; the output file is also the checkpoint, so rerunning the same command
+skips rows that already succeeded and retries the rest. The Streamlit app's batch mode drives
+the same `run_batch` generator.
+
+Input: .csv (an "idea" column, else the first column; optional "id") or .jsonl with the same keys.
+
+Usage:
+    python batch_eval.py ideas.csv --out pitch_eval.jsonl --concurrency 4 --rps 5 --export results.csv
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from shared.batch import append_record, iter_completed, load_results, percentile, read_rows, terminate_torn_line
+from shared.rate_limit import TokenBucket
+from pitch_generator import FEW_SHOT_K, FEW_SHOT_MAX_TOKENS, ZERO_SHOT_TEMPLATE, few_shot_prompt, groq_chat
+
+DEFAULT_RPS = float(os.environ.get("GROQ_RPS", "5"))  # client-side request budget; 0 disables it
+DEFAULT_BURST = int(os.environ.get("GROQ_BURST", "5"))
+
+# strategy name -> (idea, **few-shot options) -> prompt
+STRATEGIES = {
+    "zero": lambda idea, **_: ZERO_SHOT_TEMPLATE.format(idea=idea),
+    "few": lambda idea, **few_shot: few_shot_prompt(idea, **few_shot)[0],
+}
+METRICS = ("pitch", "latency_s", "prompt_tokens", "completion_tokens")
+RESULT_COLUMNS = ["id", "idea", "status"] + [f"{s}_{m}" for s in STRATEGIES for m in METRICS] + ["error"]
+
+
+# -----------------------
+# Rows
+# -----------------------
+def idea_id(idea: str) -> str:
+    # case/whitespace variants of the same idea share one id (and one checkpoint entry)
+    return hashlib.sha1(" ".join(idea.lower().split()).encode("utf-8")).hexdigest()[:16]
+
+
+def normalize_row(row: dict):
+    """{"id", "idea"} for a row, or None when it has no idea text."""
+    idea = row.get("idea")
+    if idea is None and row:
+        idea = next(iter(row.values()))
+    idea = str(idea or "").strip()
+    if not idea or idea.lower() == "nan":
+        return None
+    return {"id": str(row.get("id") or idea_id(idea)), "idea": idea}
+
+
+# -----------------------
+# Work
+# -----------------------
+def evaluate_row(job: dict, limiter: TokenBucket, temperature: float, max_tokens: int, few_shot: dict) -> dict:
+    record = {"id": job["id"], "idea": job["idea"]}
+    errors = []
+    for name, build_prompt in STRATEGIES.items():
+        limiter.acquire()
+        try:
+            prompt = build_prompt(job["idea"], **few_shot)
+            result = groq_chat(prompt, temperature, max_tokens, app="session1/batch-eval")
+        except Exception as e:
+            errors.append(f"{name}: {e}")
+            continue
+        record.update({
+            f"{name}_pitch": result["text"],
+            f"{name}_latency_s": round(result["latency_s"], 3),
+            f"{name}_prompt_tokens": result["prompt_tokens"],
+            f"{name}_completion_tokens": result["completion_tokens"],
+        })
+    record["status"] = "error" if errors else "ok"
+    record["error"] = "; ".join(errors) or None
+    return record
+
+
+def run_batch(rows, out_path: str, concurrency: int = 4, rps: float = DEFAULT_RPS, burst: int = DEFAULT_BURST,
+              temperature: float = 0.7, max_tokens: int = 128, few_shot: dict = None):
+    """
+    Evaluates `rows` (dicts) and yields each new record as it finishes, after appending it to
+    `out_path`. Rows already "ok" in `out_path` are skipped. `few_shot` holds options for
+    few_shot_prompt (k, max_prompt_tokens, min_similarity). Closing the generator early (e.g. a
+    Streamlit rerun) abandons in-flight rows; they are simply redone on the next run.
+    """
+    done = {rid for rid, r in load_results(out_path).items() if r.get("status") == "ok"}
+    terminate_torn_line(out_path)
+    limiter = TokenBucket(rps, burst)
+    queued = set()
+
+    def tasks():
+        for row in rows:
+            job = normalize_row(row)
+            if job is None or job["id"] in done or job["id"] in queued:
+                continue
+            queued.add(job["id"])
+            yield partial(evaluate_row, job, limiter, temperature, max_tokens, few_shot or {})
+
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="pitch-eval")
+    try:
+        with open(out_path, "a", encoding="utf-8") as out:
+            for record in iter_completed(pool, tasks(), window=concurrency * 2):
+                append_record(out, record)
+                yield record
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def build_report(records, elapsed_s: float = None) -> dict:
+    report = {
+        "rows": len(records),
+        "ok": sum(r.get("status") == "ok" for r in records),
+        "errors": sum(r.get("status") == "error" for r in records),
+    }
+    for name in STRATEGIES:
+        latencies = [r[f"{name}_latency_s"] for r in records if r.get(f"{name}_latency_s") is not None]
+        prompt_tokens = [r[f"{name}_prompt_tokens"] for r in records if r.get(f"{name}_prompt_tokens")]
+        completion_tokens = [r[f"{name}_completion_tokens"] for r in records if r.get(f"{name}_completion_tokens")]
+        pitches = [r[f"{name}_pitch"] for r in records if r.get(f"{name}_pitch")]
+        report[name] = {
+            "calls": len(latencies),
+            "latency_p50_s": percentile(latencies, 0.50),
+            "latency_p90_s": percentile(latencies, 0.90),
+            "prompt_tokens": sum(prompt_tokens),
+            "completion_tokens": sum(completion_tokens),
+            "avg_prompt_tokens": round(sum(prompt_tokens) / len(prompt_tokens), 1) if prompt_tokens else 0.0,
+            "avg_pitch_words": round(sum(len(p.split()) for p in pitches) / len(pitches), 1) if pitches else 0.0,
+        }
+    if elapsed_s is not None:
+        report["elapsed_s"] = round(elapsed_s, 2)
+        report["rows_per_min"] = round(len(records) / elapsed_s * 60, 1) if elapsed_s else 0.0
+    return report
+
+
+def export_csv(records, path: str):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate zero-shot vs few-shot pitch prompts over a dataset.")
+    parser.add_argument("input", help="ideas as .csv or .jsonl")
+    parser.add_argument("--out", default="pitch_eval.jsonl", help="output JSONL (also the checkpoint)")
+    parser.add_argument("--export", default=None, help="also write every result in --out to this CSV")
+    parser.add_argument("--concurrency", type=int, default=4, help="rows in flight at once")
+    parser.add_argument("--rps", type=float, default=DEFAULT_RPS, help="max requests started per second (0: no limit)")
+    parser.add_argument("--burst", type=int, default=DEFAULT_BURST)
+    parser.add_argument("--temperature", type=float, default=0.7)
+    parser.add_argument("--max-tokens", type=int, default=128)
+    parser.add_argument("--few-shot-k", type=int, default=FEW_SHOT_K, help="most similar bank examples per prompt")
+    parser.add_argument("--few-shot-max-tokens", type=int, default=FEW_SHOT_MAX_TOKENS,
+                        help="token cap on the few-shot prompt")
+    args = parser.parse_args()
+
+    resumed = sum(r.get("status") == "ok" for r in load_results(args.out).values())
+    records = []
+    started = time.perf_counter()
+    for record in run_batch(read_rows(args.input), args.out, args.concurrency, args.rps, args.burst,
+                            args.temperature, args.max_tokens,
+                            {"k": args.few_shot_k, "max_prompt_tokens": args.few_shot_max_tokens}):
+        records.append(record)
+        if len(records) % 25 == 0:
+            print(f"{len(records)} rows done", file=sys.stderr)
+
+    report = build_report(records, time.perf_counter() - started)
+    report["resumed_skipped"] = resumed
+    if args.export:
+        export_csv(list(load_results(args.out).values()), args.export)
+        report["exported"] = args.export
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
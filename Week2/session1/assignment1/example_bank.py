@@ -0,0 +1,128 @@
+# example_bank.py
+"""
+A file-backed bank of {"idea", "pitch"} examples for few-shot prompts, indexed with TF-IDF.
+
+Examples are rows of an L2-normalized TF-IDF matrix kept column-wise in numpy arrays (each
+word's postings: example ids and weights), so cosine similarity against the whole bank is a
+gather of the idea's few postings plus one np.bincount, and a partial sort picks the top k.
+Memory and search time grow with the bank's text, not with examples x vocabulary. The index is
+rebuilt only when the file changes; appending examples (add_example) is all it takes to grow it.
+"""
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+EXAMPLES_FILE = str(Path(__file__).resolve().parent / "data" / "pitch_examples.jsonl")
+
+_WORD = re.compile(r"[a-z0-9']+")
+STOPWORDS = frozenset(
+    "a an the of to in on and or but for with who whom that this these those his her their its it is are was "
+    "be been by from at as into out up over one only every can has have after before about than then".split()
+)
+
+
+def tokenize(text: str):
+    words = []
+    for word in _WORD.findall(text.lower()):
+        word = word.strip("'")
+        if len(word) < 2 or word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]  # crude plural folding: robots -> robot
+        words.append(word)
+    return words
+
+
+class ExampleBank:
+    def __init__(self, examples):
+        self.examples = [e for e in examples if e.get("idea") and e.get("pitch")]
+        self.vocab = {}
+        rows, cols, tf = [], [], []
+        for row, example in enumerate(self.examples):
+            for word, count in Counter(tokenize(f"{example['idea']} {example['pitch']}")).items():
+                rows.append(row)
+                cols.append(self.vocab.setdefault(word, len(self.vocab)))
+                tf.append(1.0 + math.log(count))  # sublinear tf
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        n = len(self.examples)
+        doc_freq = np.bincount(cols, minlength=len(self.vocab))
+        self.idf = (np.log((1 + n) / (1 + doc_freq)) + 1.0).astype(np.float32)  # smoothed idf
+        weights = np.asarray(tf, dtype=np.float32) * self.idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n)).astype(np.float32)
+        weights /= np.where(norms == 0, 1.0, norms)[rows]
+
+        # column-wise (per word) layout: postings of word i are [ptr[i]:ptr[i + 1]]
+        order = np.argsort(cols, kind="stable")
+        self._rows = rows[order]
+        self._weights = weights[order]
+        self._ptr = np.searchsorted(cols[order], np.arange(len(self.vocab) + 1))
+
+    def vectorize(self, text: str) -> dict:
+        """{word index: weight} of the unit TF-IDF vector for `text`; empty if no word is known."""
+        vector = {}
+        for word, count in Counter(tokenize(text)).items():
+            i = self.vocab.get(word)
+            if i is not None:
+                vector[i] = (1.0 + math.log(count)) * float(self.idf[i])
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {i: w / norm for i, w in vector.items()} if norm else {}
+
+    def search(self, text: str, k: int = 3):
+        """Up to `k` (cosine similarity, example) pairs, most similar first; zero-similarity ones are left out."""
+        query = self.vectorize(text)
+        if not query or k <= 0:
+            return []
+        spans = [(self._ptr[i], self._ptr[i + 1], w) for i, w in query.items()]
+        rows = np.concatenate([self._rows[a:b] for a, b, _ in spans])
+        weights = np.concatenate([self._weights[a:b] * w for a, b, w in spans])
+        scores = np.bincount(rows, weights=weights, minlength=len(self.examples))
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), self.examples[i]) for i in top if scores[i] > 0]
+
+
+def load_examples(path: str = EXAMPLES_FILE):
+    examples = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        examples.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+    except FileNotFoundError:
+        pass
+    return examples
+
+
+_lock = threading.Lock()
+_banks = {}  # path -> (file version, ExampleBank)
+
+
+def get_example_bank(path: str = EXAMPLES_FILE) -> ExampleBank:
+    """The indexed bank for `path`, rebuilt only when the file has changed since the last call."""
+    try:
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        version = None
+    with _lock:
+        cached = _banks.get(path)
+        if cached is None or cached[0] != version:
+            cached = _banks[path] = (version, ExampleBank(load_examples(path)))
+        return cached[1]
+
+
+def add_example(idea: str, pitch: str, path: str = EXAMPLES_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _lock, open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"idea": idea.strip(), "pitch": pitch.strip()}, ensure_ascii=False) + "\n")
@@ -0,0 +1,135 @@
+# pitch_generator.py
+"""
+Movie-pitch prompts and the Groq call behind them, shared by the Streamlit app (app.py) and the
+batch evaluator (batch_eval.py).
+
+The few-shot prompt is built per idea: the examples most similar to it are picked from the
+example bank (example_bank.py) and added best-first while the prompt stays under a token cap,
+so unrelated examples are not paid for on every call.
+"""
+import os
+import sys
+import threading
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from shared.context_window import count_tokens
+from shared.groq_chat import chat, fan_out
+from example_bank import get_example_bank
+
+
+# -----------------------
+# Env & Config
+# -----------------------
+load_dotenv()
+GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+DEADLINE_S = float(os.environ.get("PITCH_DEADLINE_SECONDS", "60"))  # give up on a pitch after this long
+FEW_SHOT_K = int(os.environ.get("FEW_SHOT_K", "3"))  # examples per few-shot prompt, at most
+FEW_SHOT_MAX_TOKENS = int(os.environ.get("FEW_SHOT_MAX_TOKENS", "250"))  # cap on the whole prompt
+FEW_SHOT_MIN_SIMILARITY = float(os.environ.get("FEW_SHOT_MIN_SIMILARITY", "0.15"))  # weaker matches are dropped
+
+
+# -----------------------
+# Prompt templates
+# -----------------------
+ZERO_SHOT_TEMPLATE = """Given a short movie idea, create a catchy one-sentence movie pitch suitable for a poster.
+Keep it to one sentence.
+
+Idea: "{idea}"
+"""
+
+FEW_SHOT_TEMPLATE = """Given a short movie idea, create a catchy one-sentence movie pitch suitable for a poster.
+Keep it to one sentence.
+
+Example 1:
+Idea: "A chef who can taste people's emotions in food."
+Pitch: "A gifted chef discovers the bittersweet truth hidden in every bite — and every heart."
+
+Example 2:
+Idea: "A shy teenager finds a pair of magical shoes."
+Pitch: "One step at a time, she dances her way into a world she never dreamed was hers."
+
+Example 3:
+Idea: "A scientist builds a time machine out of a photo booth."
+Pitch: "Every snapshot takes them deeper into the past — and closer to rewriting the future."
+
+Now create a pitch for this idea:
+"{idea}"
+"""
+
+# The dynamic few-shot prompt has the same layout, with examples from the bank
+FEW_SHOT_HEADER = """Given a short movie idea, create a catchy one-sentence movie pitch suitable for a poster.
+Keep it to one sentence.
+"""
+FEW_SHOT_EXAMPLE = """Example {n}:
+Idea: "{idea}"
+Pitch: "{pitch}"
+"""
+FEW_SHOT_FOOTER = """Now create a pitch for this idea:
+"{idea}"
+"""
+
+
+def few_shot_prompt(idea: str, k: int = FEW_SHOT_K, max_prompt_tokens: int = FEW_SHOT_MAX_TOKENS,
+                    min_similarity: float = FEW_SHOT_MIN_SIMILARITY):
+    """
+    (prompt, [(similarity, example), ...] used). Takes up to `k` bank examples most similar to
+    `idea`, dropping those below `min_similarity` except the best one, and adds them best-first
+    while the prompt fits `max_prompt_tokens` (an example that would overflow is skipped for a
+    shorter one). If nothing in the bank is similar, the first example is used so the model
+    still sees the format. An empty bank falls back to FEW_SHOT_TEMPLATE.
+    """
+    bank = get_example_bank()
+    if not bank.examples:
+        return FEW_SHOT_TEMPLATE.format(idea=idea), []
+    footer = FEW_SHOT_FOOTER.format(idea=idea)
+    ranked = bank.search(idea, k)
+    candidates = [c for c in ranked if c[0] >= min_similarity] or ranked[:1] or [(0.0, bank.examples[0])]
+    used, blocks = [], []
+    tokens = count_tokens(FEW_SHOT_HEADER) + count_tokens(footer)
+    for score, example in candidates:
+        block = FEW_SHOT_EXAMPLE.format(n=len(blocks) + 1, idea=example["idea"], pitch=example["pitch"])
+        cost = count_tokens(block)
+        if tokens + cost > max_prompt_tokens:
+            continue
+        blocks.append(block)
+        used.append((score, example))
+        tokens += cost
+    return "\n".join([FEW_SHOT_HEADER] + blocks + [footer]), used
+
+
+# -----------------------
+# Groq Chat helper
+# -----------------------
+def groq_chat(prompt: str, temperature: float = 0.7, max_tokens: int = 128, on_token=None,
+              app: str = "session1/zero-few-shot", cancelled: threading.Event = None) -> dict:
+    """
+    One pitch. Returns {"text", "latency_s", "ttft_s", "prompt_tokens", "completion_tokens"};
+    streaming with `on_token` and stopping on `cancelled` work as in shared.groq_chat.chat.
+    `app` labels the call in telemetry.
+    """
+    payload = {
+        "model": GROQ_MODEL,
+        "messages": [
+            {"role": "system", "content": "Return only the final pitch without extra commentary."},
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": float(temperature),
+        "max_completion_tokens": int(max_tokens)  # ✅ Correct param for Groq
+    }
+    return chat(payload, app, on_token=on_token, cancelled=cancelled, api_key=GROQ_API_KEY)
+
+
+def run_concurrently(prompts: dict, temperature: float, max_tokens: int, stream: bool,
+                     deadline_s: float = DEADLINE_S):
+    """
+    Pitches every {label: prompt} at once. Yields (label, kind, value) events as described in
+    shared.groq_chat.fan_out, with groq_chat's result dict for "done".
+    """
+    def call(prompt, on_token, cancelled):
+        return groq_chat(prompt, temperature, max_tokens, on_token=on_token, cancelled=cancelled)
+
+    return fan_out(call, prompts, deadline_s, stream=stream, thread_name_prefix="pitch")
@@ -1,31 +1,58 @@
 import os
-import requests
+import sys
+import time
 import streamlit as st
+from pathlib import Path
 from dotenv import load_dotenv
 
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from shared.groq_chat import chat, fan_out
+from shared.groq_client import format_stats
+from shared.stream_render import StreamRenderer
+
 # -----------------------
 # Load environment variables
 # -----------------------
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 MODEL = "llama3-8b-8192"   # Groq model
+DEADLINE_S = float(os.getenv("TRAVEL_DEADLINE_SECONDS", "90"))  # give up on a card after this long
+PERSONAS = ["Tour Guide", "Foodie", "Historian", "Luxury Travel Agent"]
+
+# -----------------------
+# Prompts
+# -----------------------
+def role_prompt(role, destination):
+    return f"You are a {role}. Plan a 3-day trip to {destination} in your unique style."
+
+def cot_prompt(destination):
+    return f"Plan a 3-day trip to {destination} step by step. " \
+           f"First choose attractions, then organize them into daily itineraries, " \
+           f"then add food and cultural recommendations. Explain your reasoning clearly."
 
 # -----------------------
 # Groq API Call
 # -----------------------
-def generate_response(prompt):
-    url = "https://api.groq.com/openai/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
+def generate_response(prompt, on_token=None, cancelled=None):
+    """
+    Returns {"text", "latency_s", ...}, streaming the reply to `on_token` chunk by chunk; stops
+    early once the `cancelled` event is set (see shared.groq_chat.chat).
+    """
     payload = {
         "model": MODEL,
         "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.7
+        "temperature": 0.7,
     }
-    response = requests.post(url, headers=headers, json=payload)
-    return response.json()["choices"][0]["message"]["content"]
+    return chat(payload, "session1/travel", on_token=on_token or (lambda token: None), cancelled=cancelled,
+                api_key=GROQ_API_KEY)
+
+def card_html(title, body, background):
+    return f"""
+            <div style="background-color:{background}; padding:20px; border-radius:12px; box-shadow:2px 2px 8px rgba(0,0,0,0.1);">
+            <h3>{title}</h3>
+            <p>{body}</p>
+            </div>
+            """
 
 # -----------------------
 # Streamlit UI
@@ -46,76 +73,69 @@ st.markdown(
 destination = st.text_input("📍 Enter a destination:", "Tokyo")
 
 # Prompt type selection
-prompt_type = st.radio("🎯 Choose Prompting Style:", ["Role-based", "Chain-of-Thought", "Compare Both"])
+prompt_type = st.radio("🎯 Choose Prompting Style:", ["Role-based", "Chain-of-Thought", "Compare Both", "All Personas"])
 
 # Role dropdown if Role-based or Compare
 role = None
 if prompt_type in ["Role-based", "Compare Both"]:
-    role = st.selectbox("👤 Choose a travel persona:",
-                        ["Tour Guide", "Foodie", "Historian", "Luxury Travel Agent"])
+    role = st.selectbox("👤 Choose a travel persona:", PERSONAS)
 
 # -----------------------
 # Generate button
 # -----------------------
 if st.button("✨ Generate Itinerary"):
+    # label -> (card title, background, prompt); all of them are generated at the same time
     if prompt_type == "Role-based":
-        prompt = f"You are a {role}. Plan a 3-day trip to {destination} in your unique style."
-        with st.spinner("✈️ Planning your trip..."):
-            role_output = generate_response(prompt)
-
-        st.markdown(
-            f"""
-            <div style="background-color:#f0f8ff; padding:20px; border-radius:12px; box-shadow:2px 2px 8px rgba(0,0,0,0.1);">
-            <h3>🗺️ {role} Style Itinerary</h3>
-            <p>{role_output}</p>
-            </div>
-            """, unsafe_allow_html=True
-        )
-
+        cards = {"role": (f"🗺️ {role} Style Itinerary", "#f0f8ff", role_prompt(role, destination))}
     elif prompt_type == "Chain-of-Thought":
-        prompt = f"Plan a 3-day trip to {destination} step by step. " \
-                 f"First choose attractions, then organize them into daily itineraries, " \
-                 f"then add food and cultural recommendations. Explain your reasoning clearly."
-        with st.spinner("🧠 Thinking step by step..."):
-            cot_output = generate_response(prompt)
-
-        st.markdown(
-            f"""
-            <div style="background-color:#fff0f5; padding:20px; border-radius:12px; box-shadow:2px 2px 8px rgba(0,0,0,0.1);">
-            <h3>🧠 Step-by-Step Itinerary</h3>
-            <p>{cot_output}</p>
-            </div>
-            """, unsafe_allow_html=True
-        )
-
+        cards = {"cot": ("🧠 Step-by-Step Itinerary", "#fff0f5", cot_prompt(destination))}
     elif prompt_type == "Compare Both":
-        role_prompt = f"You are a {role}. Plan a 3-day trip to {destination} in your unique style."
-        cot_prompt = f"Plan a 3-day trip to {destination} step by step. " \
-                     f"First choose attractions, then organize them into daily itineraries, " \
-                     f"then add food and cultural recommendations. Explain your reasoning clearly."
-
-        with st.spinner("✨ Generating both styles..."):
-            role_output = generate_response(role_prompt)
-            cot_output = generate_response(cot_prompt)
-
-        col1, col2 = st.columns(2)
-
-        with col1:
-            st.markdown(
-                f"""
-                <div style="background-color:#f0f8ff; padding:20px; border-radius:12px; box-shadow:2px 2px 8px rgba(0,0,0,0.1);">
-                <h3>🗺️ Role-based ({role})</h3>
-                <p>{role_output}</p>
-                </div>
-                """, unsafe_allow_html=True
-            )
-
-        with col2:
-            st.markdown(
-                f"""
-                <div style="background-color:#fff0f5; padding:20px; border-radius:12px; box-shadow:2px 2px 8px rgba(0,0,0,0.1);">
-                <h3>🧠 Chain-of-Thought</h3>
-                <p>{cot_output}</p>
-                </div>
-                """, unsafe_allow_html=True
-            )
+        cards = {
+            "role": (f"🗺️ Role-based ({role})", "#f0f8ff", role_prompt(role, destination)),
+            "cot": ("🧠 Chain-of-Thought", "#fff0f5", cot_prompt(destination)),
+        }
+    else:
+        backgrounds = ["#f0f8ff", "#fff8e7", "#f5f0ff", "#f0fff4"]
+        cards = {
+            persona: (f"🗺️ {persona}", backgrounds[i % len(backgrounds)], role_prompt(persona, destination))
+            for i, persona in enumerate(PERSONAS)
+        }
+
+    slots = {}
+    for label, col in zip(cards, st.columns(len(cards))):
+        with col:
+            slots[label] = (st.empty(), st.empty())
+        slots[label][0].markdown(card_html(cards[label][0], "✈️ Planning your trip...", cards[label][1]),
+                                 unsafe_allow_html=True)
+
+    # tokens are coalesced into frames: each frame re-sends the whole card
+    renderers = {
+        label: StreamRenderer(slots[label][0], lambda text, title=title, background=background:
+                              card_html(title, text + "▌", background))
+        for label, (title, background, _) in cards.items()
+    }
+    latencies = {}
+    started = time.perf_counter()
+    prompts = {label: card[2] for label, card in cards.items()}
+    for label, kind, value in fan_out(generate_response, prompts, DEADLINE_S, thread_name_prefix="travel"):
+        title, background, _ = cards[label]
+        card, caption = slots[label]
+        if kind == "token":
+            renderers[label].push(value)
+        elif kind == "done":
+            latencies[label] = value["latency_s"]
+            card.markdown(card_html(title, value["text"], background), unsafe_allow_html=True)
+            caption.caption(f"⏱ {value['latency_s']:.1f}s")
+        elif kind == "error":
+            card.error(value)
+        else:
+            card.markdown(card_html(title, renderers[label].text or "No reply yet.", background),
+                          unsafe_allow_html=True)
+            caption.warning(f"Stopped after {DEADLINE_S:.0f}s without finishing.")
+    wall = time.perf_counter() - started
+
+    if len(cards) > 1 and latencies:
+        st.caption(f"{len(latencies)} of {len(cards)} itineraries in {wall:.1f}s · slowest single call "
+                   f"{max(latencies.values()):.1f}s · one after another would take ~{sum(latencies.values()):.1f}s")
+
+st.caption(format_stats())
@@ -1,20 +1,47 @@
 import os
+import sys
 import json
-import requests
+import time
+from contextlib import closing
+from functools import lru_cache
+from html import escape
+from pathlib import Path
 import streamlit as st
 from dotenv import load_dotenv
-from groq import Groq
 from streamlit.components.v1 import html as st_html
 
+from chat_store import DEFAULT_USER, HIGHLIGHT_END, HIGHLIGHT_START, ChatStore, shard_path
+from model_catalog import ModelCatalog
+from model_compare import iter_model_streams
+from response_cache import ResponseCache, response_key
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from shared.context_window import ContextWindow
+from shared.groq_client import format_stats, get_client, get_session, groq_api_url, request_timeout
+from shared.stream_render import StreamRenderer
+from shared.telemetry import track
+
 # --------------------------
 # Config
 # --------------------------
 st.set_page_config(page_title="Groq AI Playground", page_icon="🤖", layout="centered")
 load_dotenv()
 api_key = os.getenv("GROQ_API_KEY")
-client = Groq(api_key=api_key)
-
-HISTORY_FILE = "chat_history.json"
+client = get_client(api_key)  # pooled and shared across reruns/sessions
+
+HISTORY_FILE = "chat_history.json"  # legacy format, imported once into HISTORY_DB
+HISTORY_DB = "chat_history.sqlite3"  # the local (anonymous) user's chats
+HISTORY_SHARDS = "chat_shards"  # one database per signed-in / ?user= user
+MODELS_CACHE_FILE = "models_cache.json"
+MODELS_TTL_SECONDS = 600
+RESPONSE_CACHE_DB = "response_cache.sqlite3"
+RESPONSE_CACHE_MAX_BYTES = 20 * 1024 * 1024
+SYSTEM_PROMPT = "You are a helpful assistant. Always respond in English."
+CONTEXT_TOKENS = 3000  # prompt budget per chat request; older turns are summarized
+SUMMARY_MODEL = "llama-3.1-8b-instant"
+CHATS_PER_PAGE = 20
+SEARCH_RESULTS = 10
+HISTORY_WINDOW = 30  # messages rendered per page of chat history
 
 # --------------------------
 # Intro / Header
@@ -32,54 +59,110 @@ st.markdown("""
 # --------------------------
 # Helpers (multi-chat for Chat Mode)
 # --------------------------
-def load_all_chats():
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"chats": {}, "active_chat": None}
-
-def save_all_chats(data):
-    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-def get_active_chat(data):
-    active_id = data.get("active_chat")
-    if not active_id or active_id not in data["chats"]:
-        return None, []
-    return active_id, data["chats"][active_id]["messages"]
-
-def new_chat(data):
-    chat_id = f"chat_{len(data['chats'])+1}"
-    data["chats"][chat_id] = {
-        "title": "Untitled Chat",
-        "messages": [
-            {"role": "system", "content": "You are a helpful assistant. Always respond in English."}
-        ]
-    }
-    data["active_chat"] = chat_id
-    return chat_id, data
-
-def delete_chat(data, chat_id):
-    if chat_id in data["chats"]:
-        del data["chats"][chat_id]
-        if data["chats"]:
-            data["active_chat"] = next(iter(data["chats"]))
+def current_user():
+    # signed-in email when the deployment has auth, else ?user=<name>, else the shared local store
+    try:
+        email = st.experimental_user.get("email")
+    except Exception:
+        email = None
+    if email and email != "test@example.com":  # placeholder Streamlit reports when running locally
+        return email
+    return st.query_params.get("user") or DEFAULT_USER
+
+@st.cache_resource
+def get_chat_store(user):
+    # one store per user shard, shared by all of that user's sessions
+    return ChatStore(
+        shard_path(user, HISTORY_SHARDS, HISTORY_DB),
+        legacy_json=HISTORY_FILE if user == DEFAULT_USER else None,
+    )
+
+store = get_chat_store(current_user())
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(RESPONSE_CACHE_DB, max_bytes=RESPONSE_CACHE_MAX_BYTES)
+
+def open_chat(chat_id, seq=None):
+    # only the active chat's messages are held in memory; the sidebar works from metadata
+    store.set_active_chat(chat_id)
+    st.session_state["active_chat"] = chat_id
+    st.session_state["messages"] = store.get_messages(chat_id)
+    # render enough history to include message `seq` (a search hit), else the last page
+    shown = len(st.session_state["messages"]) - seq if seq is not None else 0
+    st.session_state["history_window"] = max(HISTORY_WINDOW, shown)
+
+def new_chat():
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    chat_id = store.create_chat("Untitled Chat", messages)
+    st.session_state["active_chat"] = chat_id
+    st.session_state["messages"] = messages
+    st.session_state["chat_page"] = 0
+    st.session_state["history_window"] = HISTORY_WINDOW
+    return chat_id
+
+def render_bubble(role, content, truncated=False):
+    if role == "user":
+        return f"""
+                <div class="chat-row" style="justify-content: flex-end;">
+                    <div class="chat-bubble user">{content}</div>
+                    <div class="avatar">🧑</div>
+                </div>
+                """
+    note = '<div class="truncated-note">⏹ Stopped early</div>' if truncated else ""
+    return f"""
+                <div class="chat-row" style="justify-content: flex-start;">
+                    <div class="avatar">🤖</div>
+                    <div class="chat-bubble assistant">{content}{note}</div>
+                </div>
+                """
+
+@lru_cache(maxsize=4096)
+def cached_bubble(role, content, truncated=False):
+    # history messages never change, so reruns reuse their HTML
+    return render_bubble(role, content, truncated)
+
+def summarize(prompt):
+    with track("session3/summary", SUMMARY_MODEL) as call:
+        response = client.chat.completions.create(
+            model=SUMMARY_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=400,
+            temperature=0.2,
+        )
+        call.usage_from(response.usage)
+    return response.choices[0].message.content
+
+def stream_usage(chunk):
+    # Groq reports token usage on the last streamed chunk, under x_groq
+    return getattr(getattr(chunk, "x_groq", None), "usage", None)
+
+def get_context_window(chat_id):
+    windows = st.session_state.setdefault("context_windows", {})
+    if chat_id not in windows:
+        windows[chat_id] = ContextWindow(summarize, max_prompt_tokens=CONTEXT_TOKENS)
+    return windows[chat_id]
+
+def delete_chat(chat_id):
+    store.delete_chat(chat_id)
+    if chat_id == st.session_state.get("active_chat"):
+        next_id = store.most_recent_chat()
+        if next_id:
+            open_chat(next_id)
         else:
-            _, data = new_chat(data)
-    return data
+            new_chat()
 
 # --------------------------
 # Init session
 # --------------------------
-if "all_chats" not in st.session_state:
-    st.session_state["all_chats"] = load_all_chats()
-
-chat_id, messages = get_active_chat(st.session_state["all_chats"])
-if not chat_id:  # first launch
-    chat_id, st.session_state["all_chats"] = new_chat(st.session_state["all_chats"])
-    save_all_chats(st.session_state["all_chats"])
-
-st.session_state["messages"] = messages
+if "active_chat" not in st.session_state:
+    chat_id = store.get_active_chat()
+    if not chat_id or store.get_chat(chat_id) is None:
+        chat_id = store.most_recent_chat()
+    if chat_id:
+        open_chat(chat_id)
+    else:  # first launch
+        new_chat()
 
 # --------------------------
 # Sidebar
@@ -87,26 +170,35 @@ st.session_state["messages"] = messages
 st.sidebar.header("⚙️ Settings")
 
 # Mode toggle
-mode = st.sidebar.radio("Mode", ["Chat", "Text Generation"], index=0)
+mode = st.sidebar.radio("Mode", ["Chat", "Text Generation", "Compare Models"], index=0)
 
 # Model settings
+PREFERRED_MODELS = ["llama-3.3-70b-versatile", "llama-3.1-8b-instant", "gemma2-9b-it"]
+
+def fetch_models():
+    url = f"{groq_api_url()}/models"
+    headers = {"Authorization": f"Bearer {api_key}"}
+    r = get_session().get(url, headers=headers, timeout=request_timeout())
+    r.raise_for_status()
+    models = [m["id"] for m in r.json().get("data", [])]
+    return [m for m in PREFERRED_MODELS if m in models] + [m for m in sorted(models) if m not in PREFERRED_MODELS]
+
+@st.cache_resource
+def get_model_catalog():
+    return ModelCatalog(fetch_models, fallback=PREFERRED_MODELS, ttl_s=MODELS_TTL_SECONDS, cache_file=MODELS_CACHE_FILE)
+
 def get_available_models():
-    try:
-        url = "https://api.groq.com/openai/v1/models"
-        headers = {"Authorization": f"Bearer {api_key}"}
-        r = requests.get(url, headers=headers, timeout=10)
-        r.raise_for_status()
-        models = [m["id"] for m in r.json().get("data", [])]
-        preferred = ["llama-3.3-70b-versatile", "llama-3.1-8b-instant", "gemma2-9b-it"]
-        ordered = [m for m in preferred if m in models] + [m for m in sorted(models) if m not in preferred]
-        return ordered or preferred
-    except Exception:
-        return ["llama-3.3-70b-versatile", "llama-3.1-8b-instant", "gemma2-9b-it"]
+    # never blocks: served from memory/disk, refreshed in the background once stale
+    return get_model_catalog().get()
 
 models = get_available_models()
-selected_model = st.sidebar.selectbox("Model", models, index=0)
+if mode == "Compare Models":
+    compare_models = st.sidebar.multiselect("Models", models, default=models[:2], max_selections=4)
+else:
+    selected_model = st.sidebar.selectbox("Model", models, index=0)
 temperature = st.sidebar.slider("Creativity (temperature)", 0.0, 1.5, 0.7, 0.1)
 max_tokens = st.sidebar.slider("Max tokens", 50, 2000, 500, 50)
+st.sidebar.caption(format_stats())
 
 # --------------------------
 # Global Styles
@@ -135,6 +227,7 @@ st.markdown("""
     border-bottom-left-radius: 4px;
 }
 .avatar { font-size: 20px; margin: 0 8px; }
+.truncated-note { font-size: 12px; color: #888; margin-top: 6px; }
 
 </style>
 """, unsafe_allow_html=True)
@@ -164,11 +257,13 @@ if mode == "Text Generation":
     # session state
     st.session_state.setdefault("tg_prompt", "")
     st.session_state.setdefault("tg_output", "")
+    st.session_state.setdefault("tg_info", "")
 
     # clear handler (no explicit st.rerun)
     def clear_tg():
         st.session_state["tg_prompt"] = ""
         st.session_state["tg_output"] = ""
+        st.session_state["tg_info"] = ""
 
     # input card
     tg_prompt = st.text_area(
@@ -181,24 +276,42 @@ if mode == "Text Generation":
     SYSTEM_INSTRUCT = (
     "You are a concise, professional writing assistant. "
     "Write fluent, natural English. Do not output code or token-like strings.")
+    # temperature 0 is deterministic, so identical requests are always cached; otherwise opt in
+    use_cache = temperature == 0 or st.checkbox(
+        "Reuse cached answers", value=False,
+        help="Answers are cached automatically at temperature 0. Tick to reuse them at other temperatures too.",
+    )
     c1, c2 = st.columns([1,1])
     generate_clicked = c1.button("Generate", type="primary", use_container_width=True)
     c2.button("Clear", type="secondary", use_container_width=True, on_click=clear_tg)
     # generate
     if generate_clicked and tg_prompt.strip():
-        try:
-            with st.spinner("Generating…"):
-                response = client.chat.completions.create(
-                    model=selected_model,
-                    messages=[
-                        {"role": "system", "content": SYSTEM_INSTRUCT},
-                        {"role": "user", "content": tg_prompt}],
-                    max_tokens=max_tokens,
-                    temperature=temperature,
-                )
-            st.session_state["tg_output"] = (response.choices[0].message.content or "").strip()
-        except Exception as e:
-            st.error(f"❌ Error: {str(e)}")
+        response_cache = get_response_cache()
+        key = response_key(selected_model, SYSTEM_INSTRUCT, tg_prompt, temperature, max_tokens)
+        cached = response_cache.get(key) if use_cache else None
+        if cached:
+            st.session_state["tg_output"], original_s = cached
+            st.session_state["tg_info"] = f"⚡ Served from cache (the model took {original_s:.2f}s)"
+        else:
+            try:
+                started = time.perf_counter()
+                with st.spinner("Generating…"), track("session3/text", selected_model) as call:
+                    response = client.chat.completions.create(
+                        model=selected_model,
+                        messages=[
+                            {"role": "system", "content": SYSTEM_INSTRUCT},
+                            {"role": "user", "content": tg_prompt}],
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                    )
+                    call.usage_from(response.usage)
+                latency_s = time.perf_counter() - started
+                st.session_state["tg_output"] = (response.choices[0].message.content or "").strip()
+                st.session_state["tg_info"] = f"Generated in {latency_s:.2f}s"
+                if use_cache and st.session_state["tg_output"]:
+                    response_cache.put(key, st.session_state["tg_output"], latency_s)
+            except Exception as e:
+                st.error(f"❌ Error: {str(e)}")
 
     # output bubble
     if st.session_state["tg_output"]:
@@ -213,6 +326,99 @@ if mode == "Text Generation":
             f'<div class="tg-bubble">{_escape_html(st.session_state["tg_output"])}</div>',
             unsafe_allow_html=True
         )
+        if st.session_state["tg_info"]:
+            st.caption(st.session_state["tg_info"])
+
+    cache_stats = get_response_cache().stats()
+    st.sidebar.caption(
+        f"Response cache: {cache_stats['entries']} entries ({cache_stats['bytes'] / 1024:.0f} KB) · "
+        f"hit rate {cache_stats['hit_rate']:.0%} · saved {cache_stats['saved_s']:.1f}s"
+    )
+
+# --------------------------
+# COMPARE MODE (one prompt, several models at once)
+# --------------------------
+elif mode == "Compare Models":
+    st.subheader("Compare Models")
+
+    st.session_state.setdefault("cmp_results", None)
+
+    cmp_prompt = st.text_area(
+        "Prompt",
+        height=120,
+        placeholder="One prompt, sent to every selected model at the same time...",
+        label_visibility="collapsed",
+    )
+    compare_clicked = st.button("Compare", type="primary", use_container_width=True)
+
+    def compare_bubble(text):
+        return f'<div class="chat-bubble assistant" style="max-width:100%;">{text}</div>'
+
+    def token_stream(model):
+        with track("session3/compare", model, stream=True) as call:
+            stream = client.chat.completions.create(
+                model=model,
+                messages=[{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": cmp_prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+            )
+            try:
+                for chunk in stream:
+                    call.usage_from(stream_usage(chunk))
+                    if getattr(chunk, "choices", None):
+                        delta = getattr(chunk.choices[0], "delta", None)
+                        token = getattr(delta, "content", None) if delta else None
+                        if token:
+                            call.token()
+                            yield token
+            finally:
+                stream.close()  # also runs when iter_model_streams closes this generator early
+
+    def stats_caption(stats):
+        if stats.get("error"):
+            return f"❌ {stats['error']}"
+        ttft = f"{stats['ttft_s']:.2f}s" if stats["ttft_s"] is not None else "–"
+        return (f"TTFT {ttft} · {stats['tokens_per_s']:.0f} tok/s · "
+                f"total {stats['total_s']:.2f}s · {stats['tokens']} tokens")
+
+    if compare_clicked and cmp_prompt.strip() and compare_models:
+        columns = st.columns(len(compare_models))
+        renderers = {}
+        for col, model in zip(columns, compare_models):
+            col.markdown(f"**{model}**")
+            renderers[model] = StreamRenderer(col.empty(), compare_bubble)
+
+        stats = {}
+        # closing(): a rerun mid-stream stops the workers and their HTTP streams right away
+        with closing(iter_model_streams(token_stream, compare_models, stats)) as tokens:
+            for model, token in tokens:
+                renderers[model].push(token)
+
+        st.session_state["cmp_results"] = [
+            {"model": model, "text": renderers[model].finish(), "stats": stats[model]}
+            for model in compare_models
+        ]
+        for col, result in zip(columns, st.session_state["cmp_results"]):
+            col.caption(stats_caption(result["stats"]))
+    elif st.session_state["cmp_results"]:
+        results = st.session_state["cmp_results"]
+        for col, result in zip(st.columns(len(results)), results):
+            col.markdown(f"**{result['model']}**")
+            col.markdown(compare_bubble(result["text"]), unsafe_allow_html=True)
+            col.caption(stats_caption(result["stats"]))
+
+    if st.session_state["cmp_results"]:
+        ranked = sorted(
+            st.session_state["cmp_results"],
+            key=lambda r: (r["stats"]["ttft_s"] is None, r["stats"]["ttft_s"] or 0.0),
+        )
+        rows = ["| Model | TTFT | Tokens/s | Total | Tokens |", "|---|---|---|---|---|"]
+        for r in ranked:
+            m = r["stats"]
+            ttft = f"{m['ttft_s']:.2f}s" if m["ttft_s"] is not None else "–"
+            rows.append(f"| {r['model']} | {ttft} | {m['tokens_per_s']:.0f} | {m['total_s']:.2f}s | {m['tokens']} |")
+        st.markdown("\n".join(rows))
 
 # --------------------------
 # CHAT MODE (fixed + robust)
@@ -222,116 +428,150 @@ else:
 
     # Sidebar chat controls
     if st.sidebar.button("➕ New Chat"):
-        chat_id, st.session_state["all_chats"] = new_chat(st.session_state["all_chats"])
-        save_all_chats(st.session_state["all_chats"])
+        new_chat()
         st.rerun()
 
-    # Snapshot list so deleting while iterating is safe
-    chat_items = list(st.session_state["all_chats"]["chats"].items())
+    # Full-text search over every stored message
+    search_text = st.sidebar.text_input("🔎 Search chats", key="chat_search", placeholder="Search all messages…")
+    if search_text.strip():
+        started = time.perf_counter()
+        hits = store.search(search_text, limit=SEARCH_RESULTS)
+        st.sidebar.caption(f"{len(hits)} results in {(time.perf_counter() - started) * 1000:.0f} ms")
+        for n, hit in enumerate(hits):
+            snippet = (
+                escape(hit["snippet"])
+                .replace(HIGHLIGHT_START, "<mark>")
+                .replace(HIGHLIGHT_END, "</mark>")
+            )
+            who = "🧑" if hit["role"] == "user" else "🤖"
+            st.sidebar.markdown(
+                f"<b>{escape(hit['title'])}</b><br><span style='font-size:13px'>{who} {snippet}</span>",
+                unsafe_allow_html=True,
+            )
+            if st.sidebar.button("Open chat", key=f"search_hit_{n}"):
+                open_chat(hit["chat_id"], seq=hit["seq"])
+                st.rerun()
+        st.sidebar.divider()
+
+    # One page of chats, most recently active first (metadata only)
+    total_chats = store.count_chats()
+    pages = max(1, -(-total_chats // CHATS_PER_PAGE))
+    page = min(st.session_state.setdefault("chat_page", 0), pages - 1)
 
-    for cid, chat in chat_items:
+    for chat in store.list_chats(limit=CHATS_PER_PAGE, offset=page * CHATS_PER_PAGE, recent_first=True):
+        cid = chat["id"]
         cols = st.sidebar.columns([4, 1])
         with cols[0]:
             if st.button(chat["title"], key=f"select_{cid}"):
-                st.session_state["all_chats"]["active_chat"] = cid
-                save_all_chats(st.session_state["all_chats"])
+                open_chat(cid)
                 st.rerun()
         with cols[1]:
             if st.button("🗑️", key=f"delete_{cid}"):
-                st.session_state["all_chats"] = delete_chat(st.session_state["all_chats"], cid)
-                save_all_chats(st.session_state["all_chats"])
+                delete_chat(cid)
                 st.rerun()
 
-    # Guard: ensure we always have a valid active chat + messages list
-    active_chat = st.session_state["all_chats"].get("active_chat")
-    if not active_chat or active_chat not in st.session_state["all_chats"]["chats"]:
-        chat_id, st.session_state["all_chats"] = new_chat(st.session_state["all_chats"])
-        save_all_chats(st.session_state["all_chats"])
-        active_chat = chat_id
-
-    st.session_state["messages"] = st.session_state["all_chats"]["chats"][active_chat].get("messages", [])
-    if not isinstance(st.session_state["messages"], list):
-        st.session_state["messages"] = []
-
-    # Render history
-    for msg in st.session_state["messages"]:
-        if msg.get("role") == "system":
-            continue
-        role = msg.get("role", "")
-        content = msg.get("content", "")
-        if role == "user":
-            st.markdown(
-                f"""
-                <div class="chat-row" style="justify-content: flex-end;">
-                    <div class="chat-bubble user">{content}</div>
-                    <div class="avatar">🧑</div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
-        else:
-            st.markdown(
-                f"""
-                <div class="chat-row" style="justify-content: flex-start;">
-                    <div class="avatar">🤖</div>
-                    <div class="chat-bubble assistant">{content}</div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
+    if pages > 1:
+        prev_col, label_col, next_col = st.sidebar.columns([1, 2, 1])
+        if prev_col.button("◀", key="chat_page_prev", disabled=page == 0):
+            st.session_state["chat_page"] = page - 1
+            st.rerun()
+        label_col.caption(f"Page {page + 1} of {pages} · {total_chats} chats")
+        if next_col.button("▶", key="chat_page_next", disabled=page >= pages - 1):
+            st.session_state["chat_page"] = page + 1
+            st.rerun()
+
+    # Guard: ensure we always have a valid active chat
+    active_chat = st.session_state["active_chat"]
+    active_meta = store.get_chat(active_chat)
+    if active_meta is None:
+        active_chat = new_chat()
+        active_meta = store.get_chat(active_chat)
+
+    # Render history: only the last `history_window` messages, paging back on demand
+    visible = [m for m in st.session_state["messages"] if m.get("role") != "system"]
+    window = st.session_state.setdefault("history_window", HISTORY_WINDOW)
+    hidden = max(0, len(visible) - window)
+    if hidden:
+        if st.button(f"⬆ Load earlier messages ({hidden} more)", key="load_earlier"):
+            st.session_state["history_window"] = window + HISTORY_WINDOW
+            st.rerun()
+    for msg in visible[hidden:]:
+        st.markdown(
+            cached_bubble(msg.get("role", ""), msg.get("content", ""), msg.get("truncated", False)),
+            unsafe_allow_html=True,
+        )
 
     # Chat input
     prompt = st.chat_input("Type your message here...")
     if prompt:
         st.session_state["messages"].append({"role": "user", "content": prompt})
+        store.append_message(active_chat, "user", prompt)
 
-        if st.session_state["all_chats"]["chats"][active_chat]["title"] == "Untitled Chat":
-            st.session_state["all_chats"]["chats"][active_chat]["title"] = prompt[:30]
+        if active_meta["title"] == "Untitled Chat":
+            store.set_title(active_chat, prompt[:30])
 
-        st.session_state["all_chats"]["chats"][active_chat]["messages"] = st.session_state["messages"]
-        save_all_chats(st.session_state["all_chats"])
-
-        st.markdown(
-            f"""
-            <div class="chat-row" style="justify-content: flex-end;">
-                <div class="chat-bubble user">{prompt}</div>
-                <div class="avatar">🧑</div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
+        st.markdown(cached_bubble("user", prompt), unsafe_allow_html=True)
 
         placeholder = st.empty()
-        streamed = ""
+
+        def assistant_bubble(text):
+            # partial frames aren't worth caching; the finished answer is cached on the next rerun
+            return render_bubble("assistant", text)
+
+        renderer = StreamRenderer(placeholder, assistant_bubble)
+        request_messages, budget = get_context_window(active_chat).build(st.session_state["messages"])
+
+        # Clicking Stop reruns the script; Streamlit interrupts this run at its next st call
+        stop_slot = st.empty()
+        stop_slot.button("⏹ Stop generating", key="stop_stream")
 
         try:
-            stream = client.chat.completions.create(
-                model=selected_model,
-                messages=st.session_state["messages"],
-                max_tokens=max_tokens,
-                temperature=temperature,
-                stream=True,
-            )
+            with track("session3/chat", selected_model, stream=True) as call:
+                stream = client.chat.completions.create(
+                    model=selected_model,
+                    messages=request_messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    stream=True,
+                )
 
-            for chunk in stream:
-                if getattr(chunk, "choices", None):
-                    delta = getattr(chunk.choices[0], "delta", None)
-                    token = getattr(delta, "content", None) if delta else None
-                    if token:
-                        streamed += token
-                        placeholder.markdown(
-                            f"""
-                            <div class="chat-row" style="justify-content: flex-start;">
-                                <div class="avatar">🤖</div>
-                                <div class="chat-bubble assistant">{streamed}</div>
-                            </div>
-                            """,
-                            unsafe_allow_html=True,
+                try:
+                    for chunk in stream:
+                        call.usage_from(stream_usage(chunk))
+                        if getattr(chunk, "choices", None):
+                            delta = getattr(chunk.choices[0], "delta", None)
+                            token = getattr(delta, "content", None) if delta else None
+                            if token:
+                                call.token()
+                                renderer.push(token)
+                except Exception:
+                    stream.close()
+                    raise
+                except BaseException:
+                    # stopped (rerun interrupt): drop the connection so Groq stops generating,
+                    # and keep what was already shown
+                    call.cancelled = True
+                    stream.close()
+                    partial = renderer.text
+                    if partial:
+                        st.session_state["messages"].append(
+                            {"role": "assistant", "content": partial, "truncated": True}
                         )
+                        store.append_message(active_chat, "assistant", partial, truncated=True)
+                    raise
+
+            stop_slot.empty()
+            streamed = renderer.finish()
+            stats = renderer.stats()
+            st.caption(
+                f"⚡ {stats['tokens']} tokens · {stats['tokens_per_s']:.0f} tok/s · "
+                f"{stats['frames']} frames · render {stats['render_overhead']:.0%} of stream time · "
+                f"context {budget['prompt_tokens']}/{budget['limit']} tokens "
+                f"({budget['sent_turns']} recent, {budget['summarized_turns']} summarized)"
+            )
 
             st.session_state["messages"].append({"role": "assistant", "content": streamed})
-            st.session_state["all_chats"]["chats"][active_chat]["messages"] = st.session_state["messages"]
-            save_all_chats(st.session_state["all_chats"])
+            store.append_message(active_chat, "assistant", streamed)
 
         except Exception as e:
             st.error(f"❌ Streaming Error: {str(e)}")
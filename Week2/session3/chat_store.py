@@ -0,0 +1,331 @@
+# chat_store.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+DEFAULT_DB = "chat_history.sqlite3"
+LEGACY_JSON = "chat_history.json"
+DEFAULT_USER = "local"
+SHARD_DIR = "chat_shards"
+BUSY_TIMEOUT_MS = 30000  # how long a writer waits for another process's transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL REFERENCES chats(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    truncated INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS messages_by_chat ON messages(chat_id, seq);
+CREATE INDEX IF NOT EXISTS chats_by_recency ON chats(updated_at DESC);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Full-text index over message contents, kept in step with `messages` by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, content='messages', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+"""
+HIGHLIGHT_START = "\x02"  # snippet markers; callers escape the text, then swap these for tags
+HIGHLIGHT_END = "\x03"
+
+
+def fts_query(text: str) -> str:
+    """Plain search-box text -> FTS5 query: every word must match (porter-stemmed, so plurals etc. do)."""
+    return " ".join(f'"{w}"' for w in text.replace('"', " ").split())
+
+
+def shard_path(user_id: str, shard_dir: str = SHARD_DIR, default_db: str = DEFAULT_DB) -> str:
+    """One database per user; the anonymous/local user keeps `default_db`."""
+    if not user_id or user_id == DEFAULT_USER:
+        return default_db
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", user_id)[:48]
+    digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:10]
+    os.makedirs(shard_dir, exist_ok=True)
+    return os.path.join(shard_dir, f"{safe}-{digest}.sqlite3")
+
+
+class ChatStore:
+    """
+    SQLite (WAL mode) chat storage. Every change is one small transaction: appending a message
+    inserts one row and bumps its chat's counters, so write cost does not depend on history size,
+    and a crash can only lose the transaction in flight, never the existing history.
+
+    Writes go through one connection under BEGIN IMMEDIATE, which serializes writers across
+    threads and processes (others wait up to BUSY_TIMEOUT_MS). Reads use a per-thread connection
+    without the write lock; under WAL they see the last committed state and never block a writer.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB, legacy_json: str = LEGACY_JSON):
+        self.path = path
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._conn = self._connect()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._add_missing_columns()
+        self._build_fts()
+        if legacy_json:
+            self._migrate_json(legacy_json)
+
+    # -----------------------
+    # Internals
+    # -----------------------
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _reader(self):
+        """This thread's read-only connection (created on first use)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    @contextmanager
+    def _tx(self):
+        """BEGIN IMMEDIATE ... COMMIT/ROLLBACK around a block; one writer at a time across threads and processes."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _get_meta(self, key: str, conn=None):
+        row = (conn or self._conn).execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, conn, key: str, value):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _add_missing_columns(self):
+        """Brings databases created by older versions up to the current `messages` columns."""
+        with self._tx() as conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(messages)")}
+            if "truncated" not in columns:
+                conn.execute("ALTER TABLE messages ADD COLUMN truncated INTEGER NOT NULL DEFAULT 0")
+
+    def _build_fts(self):
+        """Creates the search index, indexing existing history once for stores made before it."""
+        self._conn.executescript(FTS_SCHEMA)
+        with self._tx() as conn:
+            if not self._get_meta("fts_built"):
+                conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+                self._set_meta(conn, "fts_built", "1")
+
+    def _new_chat_id(self) -> str:
+        # random, so ids never collide across deletes, sessions or processes
+        return f"chat_{uuid.uuid4().hex[:16]}"
+
+    def _migrate_json(self, legacy_json: str):
+        """One-time import of the old chat_history.json (the file itself is left untouched)."""
+        if self._get_meta("migrated_json") or not os.path.exists(legacy_json):
+            return
+        with open(legacy_json, "r", encoding="utf-8") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError:
+                data = {}
+
+        now = time.time()
+        with self._tx() as conn:
+            if self._get_meta("migrated_json"):  # another process got there first
+                return
+            for chat_id, chat in (data.get("chats") or {}).items():
+                messages = chat.get("messages") or []
+                conn.execute(
+                    "INSERT OR IGNORE INTO chats (id, title, created_at, updated_at, message_count) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (chat_id, chat.get("title", "Untitled Chat"), now, now, len(messages)),
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO messages (chat_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                    [(chat_id, i, m.get("role", ""), m.get("content", ""), now) for i, m in enumerate(messages)],
+                )
+            if data.get("active_chat"):
+                self._set_meta(conn, "active_chat", data["active_chat"])
+            self._set_meta(conn, "migrated_json", legacy_json)
+
+    # -----------------------
+    # Chats
+    # -----------------------
+    def _chat_row(self, r):
+        return {"id": r[0], "title": r[1], "created_at": r[2], "updated_at": r[3], "message_count": r[4]}
+
+    def list_chats(self, limit: int = None, offset: int = 0, recent_first: bool = False):
+        """
+        [{id, title, created_at, updated_at, message_count}], metadata only (no message bodies).
+        Creation order by default; `recent_first` orders by last activity, for paging the sidebar.
+        """
+        order = "updated_at DESC" if recent_first else "created_at, rowid"
+        rows = self._reader().execute(
+                f"SELECT id, title, created_at, updated_at, message_count FROM chats ORDER BY {order} "
+                "LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset),
+        ).fetchall()
+        return [self._chat_row(r) for r in rows]
+
+    def count_chats(self) -> int:
+        return self._reader().execute("SELECT COUNT(*) FROM chats").fetchone()[0]
+
+    def get_chat(self, chat_id: str):
+        """Metadata for one chat, or None."""
+        row = self._reader().execute(
+            "SELECT id, title, created_at, updated_at, message_count FROM chats WHERE id = ?", (chat_id,)
+        ).fetchone()
+        return self._chat_row(row) if row else None
+
+    def create_chat(self, title: str = "Untitled Chat", messages=None) -> str:
+        messages = messages or []
+        now = time.time()
+        chat_id = self._new_chat_id()
+        with self._tx() as conn:
+            conn.execute(
+                "INSERT INTO chats (id, title, created_at, updated_at, message_count) VALUES (?, ?, ?, ?, ?)",
+                (chat_id, title, now, now, len(messages)),
+            )
+            conn.executemany(
+                "INSERT INTO messages (chat_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(chat_id, i, m["role"], m["content"], now) for i, m in enumerate(messages)],
+            )
+            self._set_meta(conn, "active_chat", chat_id)
+        return chat_id
+
+    def set_title(self, chat_id: str, title: str):
+        with self._tx() as conn:
+            conn.execute("UPDATE chats SET title = ? WHERE id = ?", (title, chat_id))
+
+    def delete_chat(self, chat_id: str):
+        with self._tx() as conn:
+            conn.execute("DELETE FROM messages WHERE chat_id = ?", (chat_id,))
+            conn.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
+            if self._get_meta("active_chat") == chat_id:
+                conn.execute("DELETE FROM meta WHERE key = 'active_chat'")
+
+    def get_active_chat(self):
+        return self._get_meta("active_chat", self._reader())
+
+    def most_recent_chat(self):
+        """Id of the chat with the latest activity, or None if there are no chats."""
+        chats = self.list_chats(limit=1, recent_first=True)
+        return chats[0]["id"] if chats else None
+
+    def set_active_chat(self, chat_id: str):
+        with self._tx() as conn:
+            self._set_meta(conn, "active_chat", chat_id)
+
+    # -----------------------
+    # Messages
+    # -----------------------
+    def get_messages(self, chat_id: str):
+        """[{role, content}] in order; answers cut short also carry "truncated": True."""
+        rows = self._reader().execute(
+            "SELECT role, content, truncated FROM messages WHERE chat_id = ? ORDER BY seq", (chat_id,)
+        ).fetchall()
+        return [
+            {"role": r[0], "content": r[1], "truncated": True} if r[2] else {"role": r[0], "content": r[1]}
+            for r in rows
+        ]
+
+    def append_message(self, chat_id: str, role: str, content: str, truncated: bool = False):
+        """O(1): one indexed insert plus a counter update, whatever the history size."""
+        now = time.time()
+        with self._tx() as conn:
+            row = conn.execute("SELECT message_count FROM chats WHERE id = ?", (chat_id,)).fetchone()
+            if row is None:
+                raise KeyError(chat_id)
+            conn.execute(
+                "INSERT INTO messages (chat_id, seq, role, content, created_at, truncated) VALUES (?, ?, ?, ?, ?, ?)",
+                (chat_id, row[0], role, content, now, int(truncated)),
+            )
+            conn.execute(
+                "UPDATE chats SET message_count = message_count + 1, updated_at = ? WHERE id = ?",
+                (now, chat_id),
+            )
+
+    # -----------------------
+    # Search
+    # -----------------------
+    def search(self, text: str, limit: int = 20, snippet_tokens: int = 12, max_ranked: int = 2000):
+        """
+        Matches over user/assistant messages: [{chat_id, title, seq, role, snippet}], where
+        matched terms in `snippet` are wrapped in HIGHLIGHT_START / HIGHLIGHT_END.
+
+        Ranked by BM25 when the query matches at most `max_ranked` messages. BM25 has to visit
+        every match, so a query that matches more than that (a very common word) is ordered
+        newest first instead, which the index serves without scoring anything.
+        """
+        query = fts_query(text)
+        if not query:
+            return []
+        conn = self._reader()
+        try:
+            too_many = conn.execute(
+                "SELECT rowid FROM messages_fts WHERE messages_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+                (query, max_ranked),
+            ).fetchone()
+            order = "messages_fts.rowid DESC" if too_many else "messages_fts.rank"
+            rows = conn.execute(
+                "SELECT m.chat_id, c.title, m.seq, m.role, "
+                "snippet(messages_fts, 0, ?, ?, '…', ?) "
+                "FROM messages_fts "
+                "JOIN messages m ON m.id = messages_fts.rowid "
+                "JOIN chats c ON c.id = m.chat_id "
+                f"WHERE messages_fts MATCH ? AND m.role != 'system' ORDER BY {order} LIMIT ?",
+                (HIGHLIGHT_START, HIGHLIGHT_END, snippet_tokens, query, limit),
+            ).fetchall()
+        except sqlite3.OperationalError:  # query the tokenizer can't use, e.g. only punctuation
+            return []
+        return [
+            {"chat_id": r[0], "title": r[1], "seq": r[2], "role": r[3], "snippet": r[4]}
+            for r in rows
+        ]
+
+    def load_all(self):
+        """Everything in the old chat_history.json shape: {"chats": {id: {title, messages}}, "active_chat"}."""
+        chats = {
+            c["id"]: {"title": c["title"], "messages": self.get_messages(c["id"])}
+            for c in self.list_chats()
+        }
+        return {"chats": chats, "active_chat": self.get_active_chat()}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
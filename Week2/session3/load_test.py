@@ -0,0 +1,174 @@
+# load_test.py
+"""
+Closed-loop load driver that replays the conversations in chat_history.json against a
+Groq-compatible endpoint.
+
+Each of --concurrency workers takes a conversation and sends its user turns in order, each with
+the recorded history up to that turn (the same request the chat app would make), then takes the
+next conversation. Streamed requests report time-to-first-token as well as total latency.
+By default it starts the local stand-in (shared/groq_stub.py) in-process; pass --base-url to
+target a separately running one (or the real API, with GROQ_API_KEY set).
+
+Usage:
+    python load_test.py --concurrency 16 --passes 3 --tokens-per-sec 250 --throttle-rate 0.05
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from shared import groq_stub
+from shared.batch import percentile
+from shared.groq_client import format_stats, get_session, groq_api_url, request_timeout
+
+HISTORY_FILE = "chat_history.json"
+
+
+def load_conversations(path: str):
+    """One list of requests per chat: the history up to (and including) each user turn."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    chats = data.get("chats", data) if isinstance(data, dict) else {}
+    conversations = []
+    for chat in chats.values():
+        messages = [{"role": m["role"], "content": m["content"]} for m in chat.get("messages", [])]
+        turns = [messages[: i + 1] for i, m in enumerate(messages) if m["role"] == "user"]
+        if turns:
+            conversations.append(turns)
+    return conversations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay chat history against a Groq-compatible API.")
+    parser.add_argument("--history", default=HISTORY_FILE, help="chat_history.json to replay")
+    parser.add_argument("--concurrency", type=int, default=8, help="conversations in flight at once")
+    parser.add_argument("--passes", type=int, default=1, help="times to replay every conversation")
+    parser.add_argument("--model", default="llama-3.1-8b-instant")
+    parser.add_argument("--max-tokens", type=int, default=500)
+    parser.add_argument("--no-stream", action="store_true", help="plain JSON responses (no TTFT)")
+    parser.add_argument("--base-url", default=None, help="use an already running endpoint")
+    # forwarded to the in-process stand-in
+    parser.add_argument("--latency", default="lognormal:-1.5,0.5")
+    parser.add_argument("--tokens-per-sec", type=float, default=250.0)
+    parser.add_argument("--reply-tokens", type=int, default=120)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--script", default=None)
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        stub_args = groq_stub.build_parser().parse_args([
+            "--port", "0",
+            "--latency", args.latency,
+            "--tokens-per-sec", str(args.tokens_per_sec),
+            "--reply-tokens", str(args.reply_tokens),
+            "--throttle-rate", str(args.throttle_rate),
+            "--error-rate", str(args.error_rate),
+        ] + (["--script", args.script] if args.script else []))
+        server = groq_stub.serve(stub_args)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # groq_client reads these when the pooled session is created
+    os.environ["GROQ_BASE_URL"] = base_url
+    os.environ.setdefault("GROQ_MAX_CONNECTIONS", str(args.concurrency))
+    os.environ.setdefault("GROQ_MAX_KEEPALIVE", str(args.concurrency))
+
+    conversations = load_conversations(args.history)
+    if not conversations:
+        sys.exit(f"No conversations with user turns in {args.history}")
+    work = queue.Queue()
+    for _ in range(args.passes):
+        for turns in conversations:
+            work.put(turns)
+
+    session = get_session()
+    headers = {"Authorization": f"Bearer {os.getenv('GROQ_API_KEY') or 'stand-in'}"}
+    latencies, ttfts = [], []
+    outcomes = Counter()
+    completion_tokens = [0]
+    lock = threading.Lock()
+
+    def one_request(messages):
+        body = {"model": args.model, "messages": messages, "max_tokens": args.max_tokens,
+                "stream": not args.no_stream}
+        started = time.perf_counter()
+        ttft, tokens = None, 0
+        try:
+            with session.post(f"{groq_api_url()}/chat/completions", json=body, headers=headers,
+                              timeout=request_timeout(), stream=not args.no_stream) as r:
+                if r.status_code != 200:
+                    outcome = f"http_{r.status_code}"
+                elif args.no_stream:
+                    tokens = (r.json().get("usage") or {}).get("completion_tokens") or 0
+                    outcome = "ok"
+                else:
+                    for line in r.iter_lines():
+                        if not line.startswith(b"data: ") or line == b"data: [DONE]":
+                            continue
+                        chunk = json.loads(line[6:])
+                        delta = (chunk.get("choices") or [{}])[0].get("delta") or {}
+                        if delta.get("content"):
+                            if ttft is None:
+                                ttft = time.perf_counter() - started
+                            tokens += 1
+                        usage = (chunk.get("x_groq") or {}).get("usage")
+                        if usage:
+                            tokens = usage.get("completion_tokens") or tokens
+                    outcome = "ok"
+        except Exception as e:
+            outcome = type(e).__name__
+        elapsed = time.perf_counter() - started
+        with lock:
+            outcomes[outcome] += 1
+            if outcome == "ok":
+                latencies.append(elapsed)
+                completion_tokens[0] += tokens
+                if ttft is not None:
+                    ttfts.append(ttft)
+
+    def worker():
+        while True:
+            try:
+                turns = work.get_nowait()
+            except queue.Empty:
+                return
+            for messages in turns:
+                one_request(messages)
+
+    total = work.qsize()
+    print(f"Replaying {total} conversations ({sum(len(t) for t in conversations) * args.passes} requests) "
+          f"at concurrency {args.concurrency} against {base_url}...", file=sys.stderr)
+    run_started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - run_started
+
+    done = sum(outcomes.values())
+    print(f"\nrequests: {done} in {elapsed:.1f}s  ({done / elapsed:.1f} req/s, "
+          f"{completion_tokens[0] / elapsed:.0f} completion tok/s)")
+    print(f"latency   p50 {percentile(latencies, 0.5):.3f}s  p90 {percentile(latencies, 0.9):.3f}s  "
+          f"p99 {percentile(latencies, 0.99):.3f}s  max {max(latencies, default=0):.3f}s")
+    if ttfts:
+        print(f"TTFT      p50 {percentile(ttfts, 0.5):.3f}s  p90 {percentile(ttfts, 0.9):.3f}s  "
+              f"p99 {percentile(ttfts, 0.99):.3f}s  max {max(ttfts):.3f}s")
+    for outcome, count in outcomes.most_common():
+        print(f"  {outcome:<24} {count:>6}  ({count / done:.1%})")
+    print(format_stats())
+    if server:
+        print(f"stand-in saw {server.RequestHandlerClass.stats.counts}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
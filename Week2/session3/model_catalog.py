@@ -0,0 +1,88 @@
+# model_catalog.py
+import json
+import os
+import threading
+import time
+
+
+class ModelCatalog:
+    """
+    Process-wide model list with a TTL and stale-while-revalidate refresh.
+
+    `get()` never waits on the network: it returns the in-memory list, else the last good list
+    persisted on disk, else `fallback`, and starts a background refresh whenever that value is
+    older than `ttl_s`. Failed refreshes are retried after `retry_s`.
+    """
+
+    def __init__(self, fetch_fn, fallback, ttl_s: float = 600, retry_s: float = 30,
+                 cache_file: str = "models_cache.json"):
+        self.fetch_fn = fetch_fn  # () -> list[str]; raises on failure
+        self.fallback = list(fallback)
+        self.ttl_s = ttl_s
+        self.retry_s = retry_s
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._models = None
+        self._fetched_at = 0.0
+        self._next_attempt = 0.0
+        self._refreshing = False
+        self.last_error = None
+        self._load_disk()
+
+    def _load_disk(self):
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("models"):
+                self._models = data["models"]
+                self._fetched_at = float(data.get("fetched_at", 0))
+        except (OSError, ValueError):
+            pass
+
+    def _save_disk(self, models, fetched_at: float):
+        tmp = f"{self.cache_file}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"models": models, "fetched_at": fetched_at}, f)
+            os.replace(tmp, self.cache_file)
+        except OSError:
+            pass
+
+    def _refresh(self):
+        try:
+            models = self.fetch_fn()
+            if not models:
+                raise ValueError("empty model list")
+            now = time.time()
+            with self._lock:
+                self._models = models
+                self._fetched_at = now
+                self.last_error = None
+            self._save_disk(models, now)
+        except Exception as e:
+            with self._lock:
+                self.last_error = str(e)
+                self._next_attempt = time.time() + self.retry_s
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def refresh_async(self, force: bool = False):
+        with self._lock:
+            if self._refreshing or (not force and time.time() < self._next_attempt):
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, name="model-catalog-refresh", daemon=True).start()
+
+    def get(self):
+        with self._lock:
+            models = self._models
+            stale = time.time() - self._fetched_at > self.ttl_s
+        if models is None or stale:
+            self.refresh_async()
+        return list(models or self.fallback)
+
+    def age_s(self):
+        """Seconds since the current list was fetched, or None if still on the fallback."""
+        with self._lock:
+            return time.time() - self._fetched_at if self._models else None
@@ -0,0 +1,73 @@
+# model_compare.py
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def iter_model_streams(stream_fn, models, stats=None):
+    """
+    Runs `stream_fn(model)` (an iterable of text tokens) for every model at once on a thread pool
+    and yields (model, token) in arrival order, so the caller can render all answers from the
+    script thread (Streamlit elements can't be updated from worker threads).
+
+    `stats` (a dict, filled in place) gets one entry per model, timed in the worker so queueing
+    behind the other models doesn't skew it: ttft_s, total_s, tokens, tokens_per_s, error.
+
+    Closing the generator early (e.g. a Streamlit rerun) doesn't wait for the models: workers
+    stop at their next token and close their stream, so the HTTP responses are released too.
+    """
+    stats = {} if stats is None else stats
+    events = queue.Queue()
+    done = object()
+    cancelled = threading.Event()
+
+    def worker(model):
+        started = time.perf_counter()
+        entry = {"ttft_s": None, "total_s": None, "tokens": 0, "tokens_per_s": 0.0, "error": None}
+        tokens = None
+        try:
+            tokens = stream_fn(model)
+            for token in tokens:
+                if cancelled.is_set():
+                    break
+                if not token:
+                    continue
+                if entry["ttft_s"] is None:
+                    entry["ttft_s"] = time.perf_counter() - started
+                entry["tokens"] += 1
+                events.put((model, token))
+        except Exception as e:
+            entry["error"] = str(e)
+        finally:
+            _close(tokens)
+            entry["total_s"] = time.perf_counter() - started
+            streaming = entry["total_s"] - (entry["ttft_s"] or 0.0)
+            entry["tokens_per_s"] = entry["tokens"] / streaming if streaming > 0 else 0.0
+            stats[model] = entry
+            events.put((model, done))
+
+    remaining = len(models)
+    pool = ThreadPoolExecutor(max_workers=max(1, remaining), thread_name_prefix="compare")
+    try:
+        for model in models:
+            pool.submit(worker, model)
+        while remaining:
+            model, token = events.get()
+            if token is done:
+                remaining -= 1
+            else:
+                yield model, token
+    finally:
+        cancelled.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _close(tokens):
+    """Closes a token generator so its own cleanup (closing the HTTP stream) runs now."""
+    close = getattr(tokens, "close", None)
+    if close is not None:
+        try:
+            close()
+        except Exception:
+            pass
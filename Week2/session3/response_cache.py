@@ -0,0 +1,105 @@
+# response_cache.py
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from shared.cache_stats import CacheStats
+
+DEFAULT_DB = "response_cache.sqlite3"
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+
+
+def response_key(model: str, system: str, prompt: str, temperature: float, max_tokens: int) -> str:
+    raw = json.dumps(
+        {"model": model, "system": system, "prompt": prompt,
+         "temperature": round(float(temperature), 3), "max_tokens": int(max_tokens)},
+        sort_keys=True, separators=(",", ":"),
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk LRU cache of completion texts keyed by `response_key`. Every hit refreshes the entry's
+    last-used time; once the stored text exceeds `max_bytes`, least recently used entries are
+    evicted. Keeps hit/miss counters and how much model time the hits saved.
+    The stored size is kept as a running "bytes" counter updated by put() and eviction, so a
+    put doesn't have to sum the whole table.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                       key TEXT PRIMARY KEY,
+                       response TEXT NOT NULL,
+                       size INTEGER NOT NULL,
+                       latency_s REAL NOT NULL,
+                       last_used REAL NOT NULL
+                   )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_by_use ON responses(last_used)")
+            self._stats = CacheStats(self._conn)
+            # databases written before the counter existed: sum them once
+            if self._conn.execute("SELECT 1 FROM stats WHERE name = 'bytes'").fetchone() is None:
+                self._stats.seed(
+                    "bytes", self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                )
+
+    def get(self, key: str):
+        """Returns (response, original latency_s) or None on a miss."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response, latency_s FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats.bump("misses")
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._stats.bump("hits")
+            self._stats.bump("saved_s", row[1])
+            return row[0], row[1]
+
+    def put(self, key: str, response: str, latency_s: float):
+        size = len(response.encode("utf-8"))
+        with self._lock, self._conn:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, latency_s, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, latency_s, time.time()),
+            )
+            self._stats.bump("bytes", size - (old[0] if old else 0))
+            self._evict()
+
+    def _evict(self):
+        total = self._stats.value("bytes")
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        freed = 0
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if total - freed <= self.max_bytes:
+                break
+            doomed.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self._stats.bump("evictions", len(doomed))
+        self._stats.bump("bytes", -freed)
+
+    def stats(self) -> dict:
+        """{"hits", "misses", "hit_rate", "saved_s", "evictions", "entries", "bytes"}"""
+        with self._lock:
+            summary = self._stats.summary()
+            summary["entries"] = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        summary["evictions"] = int(summary.get("evictions", 0))
+        summary["bytes"] = int(summary.get("bytes", 0))
+        return summary
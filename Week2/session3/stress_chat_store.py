@@ -0,0 +1,110 @@
+# stress_chat_store.py
+"""
+Concurrency stress test for ChatStore: many processes x threads (one per simulated session)
+hammer one shard at once. Each session creates its own chat, appends to it, and also appends to
+one chat shared by everyone, while reader threads keep listing chats. At the end every message
+must be there exactly once with contiguous sequence numbers and matching counters.
+
+Usage: python stress_chat_store.py [--processes 4] [--threads 8] [--messages 50]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from chat_store import ChatStore
+
+
+def run_process(path: str, shared_chat: str, proc: int, threads: int, messages: int, results):
+    store = ChatStore(path, legacy_json=None)
+    stop = threading.Event()
+    reads = [0]
+    created = []
+
+    def session(n):
+        own = store.create_chat(f"p{proc}-t{n}")
+        created.append(own)
+        for i in range(messages):
+            store.append_message(own, "user", f"p{proc}-t{n}-{i}")
+            store.append_message(shared_chat, "user", f"p{proc}-t{n}-{i}")
+
+    def reader():
+        while not stop.is_set():
+            store.list_chats(limit=20, recent_first=True)
+            store.get_messages(shared_chat)
+            reads[0] += 1
+
+    watchers = [threading.Thread(target=reader) for _ in range(2)]
+    workers = [threading.Thread(target=session, args=(n,)) for n in range(threads)]
+    for t in watchers + workers:
+        t.start()
+    for t in workers:
+        t.join()
+    stop.set()
+    for t in watchers:
+        t.join()
+    results.put((created, reads[0]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress ChatStore with concurrent sessions.")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8, help="sessions per process")
+    parser.add_argument("--messages", type=int, default=50, help="messages per session")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="chat_stress_"), "stress.sqlite3")
+    store = ChatStore(path, legacy_json=None)
+    shared_chat = store.create_chat("shared")
+
+    results = multiprocessing.Queue()
+    started = time.perf_counter()
+    procs = [
+        multiprocessing.Process(
+            target=run_process, args=(path, shared_chat, p, args.threads, args.messages, results)
+        )
+        for p in range(args.processes)
+    ]
+    for p in procs:
+        p.start()
+    created, reads = [], 0
+    for _ in procs:
+        ids, n = results.get()
+        created += ids
+        reads += n
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - started
+
+    sessions = args.processes * args.threads
+    writes = sessions * args.messages * 2 + sessions
+    failures = []
+    if len(set(created)) != sessions:
+        failures.append(f"chat ids: {len(set(created))} unique of {sessions} created")
+    if store.count_chats() != sessions + 1:
+        failures.append(f"chats: {store.count_chats()} stored, expected {sessions + 1}")
+
+    expected = {shared_chat: sessions * args.messages, **{cid: args.messages for cid in created}}
+    for cid, count in expected.items():
+        meta = store.get_chat(cid)
+        rows = store._reader().execute(
+            "SELECT COUNT(*), COUNT(DISTINCT seq), MIN(seq), MAX(seq) FROM messages WHERE chat_id = ?", (cid,)
+        ).fetchone()
+        if meta is None or meta["message_count"] != count or rows != (count, count, 0, count - 1):
+            failures.append(f"{cid}: counter {meta and meta['message_count']}, rows {rows}, expected {count}")
+
+    print(f"{sessions} sessions in {args.processes} processes, {writes} write transactions in {elapsed:.2f}s "
+          f"({writes / elapsed:.0f}/s), {reads} concurrent list/read rounds")
+    if failures:
+        print(f"FAILED: {len(failures)} problems")
+        for f in failures[:20]:
+            print("  " + f)
+        sys.exit(1)
+    print("OK: no lost updates, no duplicate ids, contiguous sequence numbers")
+
+
+if __name__ == "__main__":
+    main()
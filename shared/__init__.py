@@ -0,0 +1 @@
+# Helpers shared by the Week1 and Week2 apps (Groq chat, Bedrock recipes, prompt assignments).
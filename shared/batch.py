@@ -0,0 +1,79 @@
+# batch.py
+"""
+Helpers for the resumable batch drivers (Week1/AWSBedrock/batch_generate.py and
+Week2/session1/assignment1/batch_eval.py), plus the percentile used by every report.
+
+The output JSONL file is also the checkpoint: each finished row is appended and flushed right
+away, a rerun reads it back as id -> latest record, and a crash at worst leaves a torn last
+line that is skipped on read and terminated before appending again.
+"""
+import csv
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, wait
+
+
+def read_rows(path: str):
+    """Yields dict rows from a .csv or .jsonl file."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def load_results(out_path: str) -> dict:
+    """id -> latest record in the output file (a retried row replaces its earlier attempts)."""
+    results = {}
+    if os.path.exists(out_path):
+        with open(out_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from a crash
+                results[record["id"]] = record
+    return results
+
+
+def terminate_torn_line(out_path: str):
+    """A crash mid-write can leave a partial last line; start appending on a fresh one."""
+    if os.path.exists(out_path) and os.path.getsize(out_path):
+        with open(out_path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+
+def append_record(out, record: dict):
+    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def iter_completed(pool, tasks, window: int):
+    """
+    Submits each zero-argument callable from `tasks` to `pool` and yields the results in
+    completion order. At most `window` tasks are pending at once, so `tasks` can lazily stream
+    a huge input instead of being materialized up front.
+    """
+    pending = set()
+    for task in tasks:
+        if len(pending) >= window:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield future.result()
+        pending.add(pool.submit(task))
+    while pending:
+        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in finished:
+            yield future.result()
+
+
+def percentile(values, p: float) -> float:
+    """Nearest-rank percentile (p in 0..1) of `values`; 0.0 when empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
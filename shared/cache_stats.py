@@ -0,0 +1,43 @@
+# cache_stats.py
+import sqlite3
+
+
+class CacheStats:
+    """
+    Named counters kept in a `stats` table inside a SQLite cache's own database, so they survive
+    restarts and are updated in the same transaction as the entries they describe. The owning
+    cache holds the lock and opens the transaction; these methods only run the statements.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self._conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value REAL NOT NULL)")
+
+    def bump(self, name: str, amount: float = 1.0):
+        self._conn.execute(
+            "INSERT INTO stats (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def seed(self, name: str, value: float):
+        """Sets a counter only if it doesn't exist yet (e.g. a total computed once for an old database)."""
+        self._conn.execute("INSERT OR IGNORE INTO stats (name, value) VALUES (?, ?)", (name, value))
+
+    def value(self, name: str) -> float:
+        row = self._conn.execute("SELECT value FROM stats WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0.0
+
+    def summary(self) -> dict:
+        """{"hits", "misses", "hit_rate", "saved_s"} plus every other counter, by name."""
+        values = dict(self._conn.execute("SELECT name, value FROM stats").fetchall())
+        hits = int(values.pop("hits", 0))
+        misses = int(values.pop("misses", 0))
+        total = hits + misses
+        values.update({
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "saved_s": values.get("saved_s", 0.0),
+        })
+        return values
@@ -0,0 +1,137 @@
+# context_window.py
+import threading
+from functools import lru_cache
+
+MESSAGE_OVERHEAD_TOKENS = 4  # role + separators the chat template adds per message
+
+SUMMARY_PROMPT = """Update the running summary of a conversation between a user and an assistant.
+Keep facts, names, numbers, decisions and open questions; drop greetings and filler.
+Write at most {max_words} words of plain English prose.
+
+Current summary:
+{summary}
+
+New messages to fold in:
+{transcript}
+
+Updated summary:"""
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English); cached per distinct string."""
+    return max(1, (len(text) + 3) // 4) if text else 0
+
+
+def message_tokens(message: dict) -> int:
+    return count_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+
+class ContextWindow:
+    """
+    Keeps each chat request under `max_prompt_tokens`.
+
+    System messages and the most recent turns are sent verbatim; older turns are folded into a
+    rolling summary sent as one extra system message. Folding runs `summarize_fn(prompt) -> str`
+    on a background thread, so it never delays the request that triggered it: turns that fell
+    out of the window keep being sent verbatim, over budget, until the summary covers them.
+    If the last fold failed they are dropped instead, so the prompt can't grow without bound
+    while the summarizer is down. When it folds, it folds down to `fold_ratio` of the budget
+    so the summarizer runs every few turns rather than every turn.
+    One instance per conversation; `messages` is expected to only ever grow.
+    """
+
+    def __init__(self, summarize_fn, max_prompt_tokens: int = 3000, min_recent: int = 2,
+                 fold_ratio: float = 0.6, summary_words: int = 200):
+        self.summarize_fn = summarize_fn
+        self.max_prompt_tokens = max_prompt_tokens
+        self.min_recent = min_recent
+        self.fold_ratio = fold_ratio
+        self.summary_words = summary_words
+        self._lock = threading.Lock()
+        self.summary = ""
+        self.covered = 0  # the first `covered` non-system messages are in the summary
+        self._folding = False
+        self.last_error = None
+
+    def _summary_message(self, summary: str):
+        return {"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"}
+
+    def _tail_start(self, turns, budget: int, floor: int) -> int:
+        """Index of the oldest turn that still fits in `budget`, never above len(turns) - min_recent."""
+        start = len(turns)
+        used = 0
+        for i in range(len(turns) - 1, floor - 1, -1):
+            cost = message_tokens(turns[i])
+            if used + cost > budget and len(turns) - i > self.min_recent:
+                break
+            used += cost
+            start = i
+        return start
+
+    def build(self, messages):
+        """Returns (messages to send, budget dict) and starts a background fold if turns fell out."""
+        system = [m for m in messages if m.get("role") == "system"]
+        turns = [m for m in messages if m.get("role") != "system"]
+        with self._lock:
+            summary, covered, failed = self.summary, self.covered, self.last_error is not None
+
+        fixed = sum(message_tokens(m) for m in system)
+        if summary:
+            fixed += message_tokens(self._summary_message(summary))
+        budget = max(0, self.max_prompt_tokens - fixed)
+        start = self._tail_start(turns, budget, covered)
+
+        if start > covered:
+            target = self._tail_start(turns, int(budget * self.fold_ratio), covered)
+            self._fold_async(turns[covered:target], covered, target)
+
+        first = start if failed else covered
+        request = list(system)
+        if summary:
+            request.append(self._summary_message(summary))
+        request += turns[first:]
+        # send only what the API accepts; history dicts may carry UI flags such as "truncated"
+        request = [{"role": m.get("role"), "content": m.get("content")} for m in request]
+        used = sum(message_tokens(m) for m in request)
+        return request, {
+            "prompt_tokens": used,
+            "limit": self.max_prompt_tokens,
+            "sent_turns": len(turns) - first,
+            "summarized_turns": covered,
+            "pending_turns": start - covered,  # fell out of the window, not summarized yet
+            "dropped_turns": first - covered,
+            "summary_tokens": count_tokens(summary),
+        }
+
+    def _fold_async(self, batch, old_covered: int, new_covered: int):
+        with self._lock:
+            if self._folding or not batch or self.covered != old_covered:
+                return
+            self._folding = True
+            # the summary that goes with `old_covered`, read under the same lock as the index
+            base = self.summary
+        threading.Thread(
+            target=self._fold, args=(batch, base, old_covered, new_covered), name="context-fold", daemon=True
+        ).start()
+
+    def _fold(self, batch, base: str, old_covered: int, new_covered: int):
+        transcript = "\n".join(f"{m.get('role', '')}: {m.get('content', '')}" for m in batch)
+        try:
+            prompt = SUMMARY_PROMPT.format(
+                max_words=self.summary_words, summary=base or "(none)", transcript=transcript
+            )
+            summary = (self.summarize_fn(prompt) or "").strip()
+            with self._lock:
+                if not summary:
+                    self.last_error = "empty summary"
+                elif self.covered == old_covered:
+                    self.summary = summary
+                    self.covered = new_covered
+                    self.last_error = None
+        except Exception as e:
+            with self._lock:
+                self.last_error = str(e)
+        finally:
+            with self._lock:
+                self._folding = False
@@ -0,0 +1,128 @@
+# groq_chat.py
+"""
+Chat-completion calls over the shared requests session (plain JSON or SSE streaming), and a
+fan-out that runs several of them at once and hands their events back to one thread, e.g. a
+Streamlit script filling several cards side by side.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from shared.groq_client import get_session, groq_api_url, request_timeout, stream_timeout
+from shared.telemetry import track
+
+
+def _error_message(resp) -> str:
+    try:
+        return resp.json().get("error", {}).get("message") or f"{resp.status_code} {resp.reason}"
+    except ValueError:
+        return f"{resp.status_code} {resp.reason}"
+
+
+def chat(payload: dict, app: str, on_token=None, cancelled: threading.Event = None, api_key: str = None) -> dict:
+    """
+    POSTs `payload` to /chat/completions. Returns {"text", "latency_s", "ttft_s", "prompt_tokens",
+    "completion_tokens"}. With `on_token`, the reply is streamed and each text chunk is passed to
+    it as it arrives; a stream stops early (closing the connection) once `cancelled` is set, and
+    fails if it stalls for longer than GROQ_STREAM_IDLE_TIMEOUT. `app` labels the call in
+    telemetry. API and network errors are raised as RuntimeError.
+    """
+    headers = {
+        "Authorization": f"Bearer {api_key or os.getenv('GROQ_API_KEY', '')}",
+        "Content-Type": "application/json",
+    }
+    stream = on_token is not None
+    payload = dict(payload, stream=True) if stream else payload
+    model = payload.get("model")
+
+    started = time.perf_counter()
+    try:
+        with track(app, model, stream=stream) as call:
+            with get_session().post(f"{groq_api_url()}/chat/completions", headers=headers, json=payload,
+                                    timeout=stream_timeout() if stream else request_timeout(),
+                                    stream=stream) as resp:
+                if not resp.ok:
+                    raise RuntimeError(f"Groq API Error: {_error_message(resp)}")
+                if not stream:
+                    data = resp.json()
+                    call.usage_from(data.get("usage"))
+                    text = data["choices"][0]["message"]["content"]
+                else:
+                    text = _read_stream(resp, call, on_token, cancelled)
+    except requests.exceptions.RequestException as req_err:
+        raise RuntimeError(f"Request Error: {req_err}")
+
+    return {
+        "text": text.strip(),
+        "latency_s": time.perf_counter() - started,
+        "ttft_s": call.ttft_s,
+        "prompt_tokens": call.prompt_tokens,
+        "completion_tokens": call.completion_tokens if call.completion_tokens is not None else call.chunks or None,
+    }
+
+
+def _read_stream(resp, call, on_token, cancelled) -> str:
+    parts = []
+    for line in resp.iter_lines():
+        if cancelled is not None and cancelled.is_set():
+            call.cancelled = True
+            break
+        if not line.startswith(b"data: ") or line == b"data: [DONE]":
+            continue
+        chunk = json.loads(line[6:])
+        call.usage_from((chunk.get("x_groq") or {}).get("usage"))  # sent on the last chunk
+        choices = chunk.get("choices") or []
+        token = (choices[0].get("delta") or {}).get("content") if choices else None
+        if token:
+            call.token()
+            parts.append(token)
+            on_token(token)
+    return "".join(parts)
+
+
+def fan_out(call_fn, prompts: dict, deadline_s: float, stream: bool = True, thread_name_prefix: str = "fan-out"):
+    """
+    Runs `call_fn(prompt, on_token=..., cancelled=...)` for every {label: prompt} at once, one
+    thread each, and yields (label, kind, value) on the calling thread as results arrive:
+    ("token", text) when streaming, then ("done", result), ("error", message) or, for calls
+    still running at the deadline, ("timeout", None).
+    Once the deadline passes or the generator is closed (e.g. a Streamlit rerun), streaming calls
+    are cancelled at their next chunk and stalled ones at the stream idle timeout; nothing waits
+    for them.
+    """
+    events = queue.Queue()
+    cancelled = threading.Event()
+
+    def worker(label, prompt):
+        if cancelled.is_set():
+            return
+        try:
+            on_token = (lambda token: events.put((label, "token", token))) if stream else None
+            events.put((label, "done", call_fn(prompt, on_token=on_token, cancelled=cancelled)))
+        except Exception as e:
+            events.put((label, "error", str(e)))
+
+    pool = ThreadPoolExecutor(max_workers=max(1, len(prompts)), thread_name_prefix=thread_name_prefix)
+    pending = set(prompts)
+    deadline = time.monotonic() + deadline_s
+    try:
+        for label, prompt in prompts.items():
+            pool.submit(worker, label, prompt)
+        while pending:
+            try:
+                label, kind, value = events.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                for label in pending:
+                    yield label, "timeout", None
+                return
+            if kind != "token":
+                pending.discard(label)
+            yield label, kind, value
+    finally:
+        cancelled.set()
+        pool.shutdown(wait=False, cancel_futures=True)
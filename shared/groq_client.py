@@ -0,0 +1,196 @@
+# groq_client.py
+"""
+One pooled Groq client and one pooled requests.Session per process.
+
+Streamlit re-executes the app script on every interaction, but imported modules stay loaded, so
+objects built here survive reruns and are shared by every session. Both keep TCP+TLS connections
+alive between calls and retry transient failures with jittered exponential backoff. The session
+carries POSTs (completions, image generation) that must not run twice, so it only retries what
+never reached the model: connection errors and 429 / 503 answers (honouring retry-after), never
+read timeouts or dropped responses. `connection_stats()` counts requests against newly opened
+connections.
+
+GROQ_BASE_URL (same variable and meaning as in the groq SDK) points every app somewhere other
+than api.groq.com, e.g. the local stand-in in groq_stub.py: GROQ_BASE_URL=http://127.0.0.1:8766
+
+Settings are read from the environment when they are first needed, not at import time: the apps
+import this module before calling load_dotenv(), and values from .env must still apply.
+"""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# -----------------------
+# Configuration
+# -----------------------
+DEFAULT_BASE_URL = "https://api.groq.com"
+RETRY_STATUSES = (429, 503)  # rejected before any work is done, so safe to resend a POST
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name) or default)
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name) or default)
+
+
+def groq_api_url() -> str:
+    """The OpenAI-compatible API root, e.g. https://api.groq.com/openai/v1."""
+    return f"{(os.environ.get('GROQ_BASE_URL') or DEFAULT_BASE_URL).rstrip('/')}/openai/v1"
+
+
+def request_timeout(read: float = None) -> tuple:
+    """(connect, read) seconds for requests calls; `read` overrides GROQ_READ_TIMEOUT."""
+    if read is None:
+        read = _env_float("GROQ_READ_TIMEOUT", 60)
+    return _env_float("GROQ_CONNECT_TIMEOUT", 5), read
+
+
+def stream_timeout() -> tuple:
+    """
+    (connect, read) seconds for streamed calls. The read timeout applies to every chunk, so it is
+    the longest silence tolerated mid-stream (GROQ_STREAM_IDLE_TIMEOUT): a stalled stream raises
+    instead of blocking its thread until the server gives up.
+    """
+    return request_timeout(read=_env_float("GROQ_STREAM_IDLE_TIMEOUT", 20))
+
+_lock = threading.Lock()
+_clients = {}
+_session = None
+
+
+class _Counter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+
+    def add(self, requests_: int = 0, connections: int = 0):
+        with self._lock:
+            self.requests += requests_
+            self.connections += connections
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            requests_, connections = self.requests, self.connections
+        reused = max(0, requests_ - connections)
+        return {
+            "requests": requests_,
+            "connections": connections,
+            "reused": reused,
+            "reuse_rate": reused / requests_ if requests_ else 0.0,
+        }
+
+
+_sdk_counter = _Counter()
+
+
+# -----------------------
+# Groq SDK client (httpx underneath)
+# -----------------------
+def _trace(event_name: str, info):
+    # httpcore reports every new TCP connection; everything else rode an existing one
+    if event_name == "connection.connect_tcp.complete":
+        _sdk_counter.add(connections=1)
+
+
+def _on_request(request):
+    _sdk_counter.add(requests_=1)
+    request.extensions["trace"] = _trace
+
+
+def get_client(api_key: str = None):
+    """The process-wide groq.Groq client for `api_key` (default: GROQ_API_KEY)."""
+    # imported here so the requests-only apps don't need the groq package installed
+    import httpx
+    from groq import Groq
+
+    api_key = api_key or os.getenv("GROQ_API_KEY")
+    with _lock:
+        client = _clients.get(api_key)
+        if client is None:
+            connect, read = request_timeout()
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=_env_int("GROQ_MAX_CONNECTIONS", 20),
+                    max_keepalive_connections=_env_int("GROQ_MAX_KEEPALIVE", 10),
+                ),
+                timeout=httpx.Timeout(read, connect=connect),
+                event_hooks={"request": [_on_request]},
+            )
+            # no base_url: the SDK reads GROQ_BASE_URL itself, now that .env has been loaded.
+            # It also retries 429/5xx/connection errors, with jittered exponential backoff
+            client = _clients[api_key] = Groq(
+                api_key=api_key, http_client=http_client, max_retries=_env_int("GROQ_MAX_RETRIES", 3)
+            )
+        return client
+
+
+# -----------------------
+# requests.Session for the plain-HTTP callers
+# -----------------------
+def _retry() -> Retry:
+    options = dict(
+        total=_env_int("GROQ_MAX_RETRIES", 3),
+        read=False,  # re-raise read errors: they may come after the server ran the request
+        other=0,
+        backoff_factor=_env_float("GROQ_BACKOFF_FACTOR", 0.5),
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=None,  # status retries for POSTs too; read retries are off above
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand the last response back so callers can show the API error
+    )
+    try:
+        return Retry(backoff_jitter=_env_float("GROQ_BACKOFF_JITTER", 0.5), **options)
+    except TypeError:  # urllib3 < 2 has no jitter option
+        return Retry(**options)
+
+
+def get_session() -> requests.Session:
+    """The process-wide pooled session. Pass `timeout=request_timeout()` on each call."""
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=_env_int("GROQ_MAX_KEEPALIVE", 10),
+                pool_maxsize=_env_int("GROQ_MAX_CONNECTIONS", 20),
+                max_retries=_retry(),
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _session_snapshot() -> dict:
+    counter = _Counter()
+    if _session is not None:
+        for adapter in set(_session.adapters.values()):
+            manager = getattr(adapter, "poolmanager", None)
+            if manager is None:
+                continue
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is not None:
+                    counter.add(requests_=pool.num_requests, connections=pool.num_connections)
+    return counter.snapshot()
+
+
+def connection_stats() -> dict:
+    """{"sdk": {...}, "http": {...}}, each {requests, connections, reused, reuse_rate}."""
+    return {"sdk": _sdk_counter.snapshot(), "http": _session_snapshot()}
+
+
+def format_stats(stats: dict = None) -> str:
+    """One-line summary for a caption, e.g. 'Connections: 41 requests over 3 connections (93% reused)'."""
+    stats = stats or connection_stats()
+    requests_ = stats["sdk"]["requests"] + stats["http"]["requests"]
+    connections = stats["sdk"]["connections"] + stats["http"]["connections"]
+    reused = max(0, requests_ - connections)
+    rate = reused / requests_ if requests_ else 0.0
+    return f"Connections: {requests_} requests over {connections} connections ({rate:.0%} reused)"
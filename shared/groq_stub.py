@@ -0,0 +1,225 @@
+# groq_stub.py
+"""
+Local stand-in for Groq's OpenAI-compatible API: GET /openai/v1/models and
+POST /openai/v1/chat/completions, both plain JSON and SSE streaming (`"stream": true`).
+
+Point every app at it with GROQ_BASE_URL=http://127.0.0.1:8766 (any GROQ_API_KEY works; keys are
+not checked). The plain /v1/... paths are accepted too, for generic OpenAI clients. Streamed
+replies send one word per chunk at --tokens-per-sec and end with Groq's `x_groq.usage` chunk;
+429s carry a retry-after header like the real API.
+
+Scripted replies come from a JSONL file of {"match": "<regex>", "response": "<text>"} lines,
+tried in order against the last user message; anything unmatched gets a filler reply of
+--reply-tokens words.
+
+Usage:
+    python shared/groq_stub.py --latency lognormal:-1.5,0.5 --tokens-per-sec 250 \
+        --throttle-rate 0.05 --error-rate 0.01 --script replies.jsonl
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from shared.stub_server import StubHandler, StubStats, serve as serve_stub
+
+DEFAULT_MODELS = ["llama-3.3-70b-versatile", "llama-3.1-8b-instant", "gemma2-9b-it", "llama3-8b-8192",
+                  "llama3-70b-8192"]
+FILLER = ("The local stand-in is answering instead of Groq, so this reply is placeholder text of "
+          "roughly the requested length with no particular meaning behind it.").split()
+
+
+# -----------------------
+# Behaviour
+# -----------------------
+def load_script(path: str):
+    """[(compiled regex, reply)] from a JSONL script file; [] when no file is given."""
+    if not path:
+        return []
+    rules = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                rule = json.loads(line)
+                rules.append((re.compile(rule["match"], re.IGNORECASE | re.DOTALL), rule["response"]))
+    return rules
+
+
+def reply_for(messages, script, reply_tokens: int) -> str:
+    prompt = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+    for pattern, response in script:
+        if pattern.search(prompt):
+            return response
+    words = [FILLER[i % len(FILLER)] for i in range(max(1, reply_tokens))]
+    return f"(stand-in reply to: {prompt[:60]!r}) " + " ".join(words)
+
+
+def split_tokens(text: str):
+    """Words with their trailing whitespace, so the pieces join back into `text` exactly."""
+    return re.findall(r"\S+\s*|\s+", text) or [""]
+
+
+def count_prompt_tokens(messages) -> int:
+    return sum(max(1, len(m.get("content") or "") // 4) + 4 for m in messages)
+
+
+# -----------------------
+# Server
+# -----------------------
+class GroqStubHandler(StubHandler):
+    script = []
+
+    def _route(self):
+        m = re.match(r"^(?:/openai)?/v1/(models|chat/completions)/?$", self.path.split("?", 1)[0])
+        return m.group(1) if m else None
+
+    def _send_error(self, status: int, message: str, kind: str, code: str, headers: dict = None):
+        self._send_json(status, {"error": {"message": message, "type": kind, "code": code}}, headers)
+
+    def handle_get(self):
+        if self._route() == "models":
+            created = int(time.time())
+            self._send_json(200, {"object": "list", "data": [
+                {"id": m, "object": "model", "created": created, "owned_by": "stand-in", "active": True}
+                for m in self.config.models
+            ]})
+        else:
+            self._send_error(404, f"Unknown path {self.path}", "invalid_request_error", "unknown_url")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw_body = self.rfile.read(length)
+        if self._route() != "chat/completions":
+            self._send_error(404, f"Unknown path {self.path}", "invalid_request_error", "unknown_url")
+            return
+
+        self.stats.bump("requests")
+        cfg = self.config
+        if random.random() < cfg.throttle_rate:
+            self.stats.bump("throttled")
+            self._send_error(
+                429, f"Rate limit reached. Please try again in {cfg.retry_after}s.", "tokens", "rate_limit_exceeded",
+                {"retry-after": str(cfg.retry_after)},
+            )
+            return
+        if random.random() < cfg.error_rate:
+            self.stats.bump("errors")
+            self._send_error(503, "Service Unavailable (injected by the stand-in)", "internal_server_error",
+                             "service_unavailable")
+            return
+
+        try:
+            request = json.loads(raw_body or b"{}")
+            messages = list(request["messages"])
+        except (ValueError, KeyError, TypeError):
+            self._send_error(400, "'messages' : property is missing or not a list", "invalid_request_error",
+                             "invalid_request")
+            return
+
+        model = request.get("model") or cfg.models[0]
+        tokens = split_tokens(reply_for(messages, self.script, cfg.reply_tokens))
+        max_tokens = request.get("max_tokens") or request.get("max_completion_tokens")
+        finish_reason = "stop"
+        if max_tokens and len(tokens) > int(max_tokens):
+            tokens = tokens[: int(max_tokens)]
+            finish_reason = "length"
+        usage = {
+            "prompt_tokens": count_prompt_tokens(messages),
+            "completion_tokens": len(tokens),
+            "total_tokens": count_prompt_tokens(messages) + len(tokens),
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        time.sleep(cfg.sample_latency())  # queueing + prompt processing before the first token
+        if not request.get("stream"):
+            time.sleep(len(tokens) / cfg.tokens_per_sec)
+            self.stats.bump("completion_tokens", len(tokens))
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": finish_reason,
+                    "logprobs": None,
+                }],
+                "usage": usage,
+            })
+            return
+
+        self.stats.bump("streams")
+        self._start_chunked("text/event-stream", {"Cache-Control": "no-cache"})
+
+        def chunk(delta, finish=None, extra=None):
+            body = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish, "logprobs": None}],
+            }
+            body.update(extra or {})
+            self._write_chunk(f"data: {json.dumps(body)}\n\n".encode("utf-8"))
+
+        sent = 0
+        try:
+            chunk({"role": "assistant", "content": ""})
+            for token in tokens:
+                time.sleep(1.0 / cfg.tokens_per_sec)
+                chunk({"content": token})
+                sent += 1
+            chunk({}, finish_reason, {"x_groq": {"id": completion_id, "usage": usage}})
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._end_chunked()
+        except (BrokenPipeError, ConnectionResetError):
+            # the client closed the stream (e.g. the user pressed Stop): stop generating
+            self.stats.bump("disconnected")
+            self.close_connection = True
+        finally:
+            self.stats.bump("completion_tokens", sent)
+
+
+def serve(config: argparse.Namespace):
+    """Starts the stand-in on a background thread and returns the server (call .shutdown() to stop)."""
+    stats = StubStats("requests", "streams", "throttled", "errors", "disconnected", "completion_tokens")
+    return serve_stub(GroqStubHandler, config, stats, script=load_script(config.script))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Local Groq (OpenAI-compatible) stand-in server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", default="lognormal:-1.5,0.5", help="time-to-first-token distribution (s)")
+    parser.add_argument("--tokens-per-sec", type=float, default=250.0)
+    parser.add_argument("--reply-tokens", type=int, default=120, help="length of unscripted replies, in words")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry-after seconds sent with 429s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 503")
+    parser.add_argument("--script", default=None, help='JSONL of {"match": regex, "response": text} replies')
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS, help="ids listed by /models")
+    parser.add_argument("--verbose", action="store_true")
+    return parser
+
+
+def main():
+    config = build_parser().parse_args()
+    server = serve(config)
+    print(f"Groq stand-in listening on http://{config.host}:{server.server_address[1]} "
+          f"(set GROQ_BASE_URL to this)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# stream_render.py
+import time
+
+
+class StreamRenderer:
+    """
+    Coalesces streamed tokens into frames before touching the placeholder.
+
+    A frame is pushed when `interval_s` has passed since the last one, or when the unrendered
+    text reaches the byte budget. The budget grows with the answer (a quarter of what is already
+    shown), so a fast stream costs O(log n) full re-renders instead of one per token. A slow
+    stream is paced by the clock instead: about one frame per `interval_s` of streaming (never
+    more than one per token), so the text keeps moving, at the price of up to
+    duration / interval_s re-renders.
+    Streamlit placeholders can only replace their content, so each frame still sends the full
+    text; `finish()` always renders the complete text, identical to rendering every token.
+    """
+
+    def __init__(self, placeholder, render_fn, interval_s: float = 0.05, min_bytes: int = 256):
+        self.placeholder = placeholder
+        self.render_fn = render_fn  # text -> HTML for placeholder.markdown
+        self.interval_s = interval_s
+        self.min_bytes = min_bytes
+        self._parts = []
+        self._length = 0
+        self._rendered_length = 0
+        self._last_frame = 0.0
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.tokens = 0
+        self.frames = 0
+        self.render_s = 0.0
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def push(self, token: str):
+        if not token:
+            return
+        now = time.perf_counter()
+        if self.first_token_at is None:
+            self.first_token_at = now
+        self._parts.append(token)
+        self._length += len(token)
+        self.tokens += 1
+
+        pending = self._length - self._rendered_length
+        budget = max(self.min_bytes, self._rendered_length // 4)
+        if now - self._last_frame >= self.interval_s or pending >= budget:
+            self._render()
+
+    def _render(self):
+        started = time.perf_counter()
+        text = self.text
+        # keep the joined string so later frames don't re-join every token
+        self._parts = [text]
+        self.placeholder.markdown(self.render_fn(text), unsafe_allow_html=True)
+        self._rendered_length = self._length
+        self._last_frame = time.perf_counter()
+        self.frames += 1
+        self.render_s += self._last_frame - started
+
+    def finish(self) -> str:
+        """Renders the final text (if anything is unrendered) and returns it."""
+        if self._length != self._rendered_length:
+            self._render()
+        return self.text
+
+    def stats(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        streaming = elapsed - ((self.first_token_at or self.started) - self.started)
+        return {
+            "tokens": self.tokens,
+            "frames": self.frames,
+            "ttft_s": (self.first_token_at - self.started) if self.first_token_at else None,
+            "tokens_per_s": self.tokens / streaming if streaming > 0 else 0.0,
+            "render_s": self.render_s,
+            "render_overhead": self.render_s / elapsed if elapsed > 0 else 0.0,
+        }
@@ -0,0 +1,96 @@
+# stub_server.py
+"""
+Scaffolding shared by the local API stand-ins (shared/groq_stub.py and
+Week1/AWSBedrock/bedrock_stub.py): latency distributions, thread-safe counters served at
+GET /stats, JSON and chunked responses, and starting the server on a background thread.
+Each stand-in only supplies its own routes and request/response framing.
+"""
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def parse_latency(spec: str):
+    """'fixed:0.4' | 'uniform:0.2,1.0' | 'normal:0.6,0.15' | 'lognormal:mu,sigma' -> sampler()."""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda: max(0.0, random.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return lambda: random.lognormvariate(values[0], values[1])
+    raise ValueError(f"unknown latency distribution: {spec}")
+
+
+class StubStats:
+    def __init__(self, *names: str):
+        self._lock = threading.Lock()
+        self.counts = dict.fromkeys(names, 0)
+
+    def bump(self, name: str, n: int = 1):
+        with self._lock:
+            self.counts[name] += n
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None  # argparse.Namespace, set by serve()
+    stats = None
+
+    def log_message(self, fmt, *args):
+        if self.config.verbose:
+            super().log_message(fmt, *args)
+
+    def _send_json(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_chunked(self, content_type: str, headers: dict = None):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(200, self.stats.counts)
+        else:
+            self.handle_get()
+
+    def handle_get(self):
+        """GET on anything but /stats; stand-ins with readable routes override this."""
+        self._send_json(404, {"message": "Not found"})
+
+
+def serve(handler_cls, config, stats: StubStats, **attrs) -> ThreadingHTTPServer:
+    """
+    Starts `handler_cls` on config.host:config.port on a background thread and returns the server
+    (call .shutdown() to stop). `attrs` become class attributes of the handler, next to config
+    (with config.sample_latency parsed from config.latency) and stats.
+    """
+    config.sample_latency = parse_latency(config.latency)
+    handler = type("Handler", (handler_cls,), {"config": config, "stats": stats, **attrs})
+    server = ThreadingHTTPServer((config.host, config.port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
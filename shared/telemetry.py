@@ -0,0 +1,168 @@
+# telemetry.py
+"""
+Per-call LLM telemetry: model, prompt/completion tokens, time-to-first-token, tokens/sec, total
+latency and error for every call, kept in an in-process ring buffer and appended to a rotating
+JSONL file that `telemetry_dashboard.py` reads.
+
+The calling thread only builds a dict and puts it on a queue; a QueueListener thread does the
+file I/O, so recording costs tens of microseconds per call, off the network path.
+Run the dashboard with: streamlit run shared/telemetry_dashboard.py
+
+    with track("session3/chat", model, stream=True) as call:
+        for chunk in stream:
+            call.token()
+        call.usage(prompt_tokens, completion_tokens)
+"""
+import glob
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+# -----------------------
+# Configuration
+# -----------------------
+TELEMETRY_FILE = os.environ.get(
+    "LLM_TELEMETRY_FILE", str(Path(__file__).resolve().parents[1] / "telemetry" / "llm_calls.jsonl")
+)
+RING_SIZE = int(os.environ.get("LLM_TELEMETRY_RING", "2000"))
+MAX_FILE_BYTES = int(os.environ.get("LLM_TELEMETRY_MAX_BYTES", str(5 * 1024 * 1024)))
+BACKUP_COUNT = int(os.environ.get("LLM_TELEMETRY_BACKUPS", "5"))
+
+_ring = deque(maxlen=RING_SIZE)
+_logger = None
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def _get_logger():
+    global _logger, _listener
+    if _logger is None:
+        with _setup_lock:
+            if _logger is None:
+                logger = logging.getLogger("llm_telemetry")
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                try:
+                    os.makedirs(os.path.dirname(TELEMETRY_FILE), exist_ok=True)
+                    handler = logging.handlers.RotatingFileHandler(
+                        TELEMETRY_FILE, maxBytes=MAX_FILE_BYTES, backupCount=BACKUP_COUNT, encoding="utf-8"
+                    )
+                    handler.setFormatter(logging.Formatter("%(message)s"))
+                    records = queue.SimpleQueue()
+                    logger.addHandler(logging.handlers.QueueHandler(records))
+                    _listener = logging.handlers.QueueListener(records, handler)
+                    _listener.start()
+                except OSError:
+                    logger.addHandler(logging.NullHandler())  # read-only disk: keep the ring buffer only
+                _logger = logger
+    return _logger
+
+
+def record(app: str, model: str, latency_s: float, ttft_s: float = None, prompt_tokens: int = None,
+           completion_tokens: int = None, error: str = None, stream: bool = False,
+           cancelled: bool = False) -> dict:
+    """Stores one finished call; returns the record."""
+    generating = latency_s - (ttft_s or 0.0) if stream else latency_s
+    entry = {
+        "ts": time.time(),
+        "app": app,
+        "model": model,
+        "stream": stream,
+        "latency_s": round(latency_s, 4),
+        "ttft_s": round(ttft_s, 4) if ttft_s is not None else None,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "tokens_per_s": round(completion_tokens / generating, 2) if completion_tokens and generating > 0 else None,
+        "error": error,
+        "cancelled": cancelled,
+    }
+    _ring.append(entry)
+    _get_logger().info(json.dumps(entry))
+    return entry
+
+
+class Call:
+    """Timing for one in-flight call; see `track`."""
+
+    def __init__(self, app: str, model: str, stream: bool):
+        self.app = app
+        self.model = model
+        self.stream = stream
+        self.started = time.perf_counter()
+        self.ttft_s = None
+        self.chunks = 0
+        self.prompt_tokens = None
+        self.completion_tokens = None
+        self.error = None
+        self.cancelled = False  # stopped by the caller; not an error
+
+    def token(self):
+        """Call once per streamed chunk that carries text."""
+        if self.ttft_s is None:
+            self.ttft_s = time.perf_counter() - self.started
+        self.chunks += 1
+
+    def usage(self, prompt_tokens=None, completion_tokens=None):
+        self.prompt_tokens = prompt_tokens if prompt_tokens is not None else self.prompt_tokens
+        self.completion_tokens = completion_tokens if completion_tokens is not None else self.completion_tokens
+
+    def usage_from(self, usage):
+        """Takes an OpenAI-style usage object or dict (or None)."""
+        if usage is None:
+            return
+        get = usage.get if isinstance(usage, dict) else lambda k: getattr(usage, k, None)
+        self.usage(get("prompt_tokens"), get("completion_tokens"))
+
+
+@contextmanager
+def track(app: str, model: str, stream: bool = False):
+    """Times the block as one LLM call and records it, including the exception if it raises."""
+    call = Call(app, model, stream)
+    try:
+        yield call
+    except GeneratorExit:  # a streaming generator closed early by its consumer
+        call.cancelled = True
+        raise
+    except BaseException as e:
+        if not call.cancelled:  # the caller may already have flagged an interruption as a stop
+            call.error = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        completion = call.completion_tokens
+        if completion is None and call.chunks:
+            completion = call.chunks  # streamed without a usage block: one chunk ~ one token
+        record(call.app, call.model, time.perf_counter() - call.started, call.ttft_s,
+               call.prompt_tokens, completion, call.error, call.stream, call.cancelled)
+
+
+def recent(n: int = None):
+    """The latest records from this process, oldest first."""
+    items = list(_ring)
+    return items[-n:] if n else items
+
+
+def load_records(path: str = TELEMETRY_FILE, since: float = None):
+    """Every record in the file and its rotated backups (all processes), oldest first."""
+    records = []
+    backups = [p for p in glob.glob(f"{glob.escape(path)}.*") if p.rsplit(".", 1)[-1].isdigit()]
+    for name in backups + [path]:
+        try:
+            with open(name, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # line torn by a concurrent write or crash
+                    if since is None or entry.get("ts", 0) >= since:
+                        records.append(entry)
+        except OSError:
+            continue
+    records.sort(key=lambda r: r.get("ts", 0))
+    return records
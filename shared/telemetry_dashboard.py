@@ -0,0 +1,98 @@
+# telemetry_dashboard.py
+# Run with: streamlit run shared/telemetry_dashboard.py
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from shared.telemetry import TELEMETRY_FILE, load_records
+
+st.set_page_config(page_title="LLM Call Telemetry", page_icon="📈", layout="wide")
+st.title("📈 LLM Call Telemetry")
+st.caption(f"Reading {TELEMETRY_FILE}")
+
+# --------------------------
+# Filters
+# --------------------------
+windows = {"Last 15 minutes": 15 * 60, "Last hour": 3600, "Last 24 hours": 86400, "Last 7 days": 7 * 86400}
+window_label = st.sidebar.selectbox("Time range", list(windows), index=1)
+bucket = st.sidebar.selectbox("Bucket", ["1min", "5min", "15min", "1h"], index=1)
+metric = st.sidebar.selectbox("Chart metric", ["latency_s", "ttft_s", "tokens_per_s"], index=0)
+percentile = st.sidebar.selectbox("Percentile", [50, 90, 95, 99], index=2)
+if st.sidebar.button("Refresh"):
+    st.rerun()
+
+records = load_records(since=time.time() - windows[window_label])
+if not records:
+    st.info("No LLM calls recorded in this time range yet.")
+    st.stop()
+
+df = pd.DataFrame(records)
+df["time"] = pd.to_datetime(df["ts"], unit="s")
+df["failed"] = df["error"].notna()
+
+apps = sorted(df["app"].unique())
+chosen_apps = st.sidebar.multiselect("Apps", apps, default=apps)
+df = df[df["app"].isin(chosen_apps)]
+if df.empty:
+    st.info("No calls from the selected apps.")
+    st.stop()
+
+# --------------------------
+# Per-model summary
+# --------------------------
+def pct(q):
+    return lambda s: s.dropna().quantile(q / 100) if s.notna().any() else None
+
+ok = df[~df["failed"]]
+summary = df.groupby("model").agg(calls=("model", "size"), errors=("failed", "sum"))
+summary["error_rate"] = summary["errors"] / summary["calls"]
+for col in ["latency_s", "ttft_s", "tokens_per_s"]:
+    for q in (50, 95, 99):
+        summary[f"{col} p{q}"] = ok.groupby("model")[col].agg(pct(q))
+summary["completion tokens"] = ok.groupby("model")["completion_tokens"].sum()
+
+c1, c2, c3, c4 = st.columns(4)
+c1.metric("Calls", len(df))
+c2.metric("Error rate", f"{df['failed'].mean():.1%}")
+c3.metric("p95 latency", f"{ok['latency_s'].quantile(0.95):.2f}s" if not ok.empty else "–")
+c4.metric("p50 TTFT", f"{ok['ttft_s'].dropna().median():.2f}s" if ok["ttft_s"].notna().any() else "–")
+
+st.subheader("Per model")
+st.dataframe(summary.sort_values("calls", ascending=False), use_container_width=True)
+
+# --------------------------
+# Percentile over time
+# --------------------------
+st.subheader(f"p{percentile} {metric} over time")
+valid = ok.dropna(subset=[metric])
+if valid.empty:
+    st.info(f"No {metric} values in this range (non-streamed calls have no TTFT).")
+else:
+    series = (
+        valid.astype({metric: float})
+        .set_index("time")
+        .groupby("model")[metric]
+        .resample(bucket)
+        .quantile(percentile / 100)
+        .unstack(0)
+    )
+    st.line_chart(series)
+
+st.subheader("Calls per bucket")
+st.bar_chart(df.set_index("time").groupby("model").resample(bucket).size().unstack(0).fillna(0))
+
+# --------------------------
+# Errors & raw records
+# --------------------------
+errors = df[df["failed"]]
+if not errors.empty:
+    st.subheader("Recent errors")
+    st.dataframe(errors.sort_values("ts", ascending=False)[["time", "app", "model", "error"]].head(50),
+                 use_container_width=True)
+
+with st.expander("Raw records"):
+    st.dataframe(df.sort_values("ts", ascending=False).drop(columns=["ts"]).head(500), use_container_width=True)
@@ -0,0 +1,52 @@
+# test_context_window.py
+import threading
+
+from shared.context_window import ContextWindow
+
+
+def conversation(n):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i} " + "x" * 36}
+            for i in range(n)]
+
+
+def wait_for_fold(window):
+    for thread in threading.enumerate():
+        if thread.name == "context-fold":
+            thread.join(5)
+
+
+def test_turns_outside_the_window_are_sent_until_summarized():
+    release = threading.Event()
+
+    def summarize(prompt):
+        release.wait(5)
+        return "they talked"
+
+    window = ContextWindow(summarize, max_prompt_tokens=100, min_recent=2)
+    messages = conversation(12)
+    request, budget = window.build(messages)
+    # the fold is still running: nothing is dropped, the request is over budget meanwhile
+    assert [m["content"] for m in request] == [m["content"] for m in messages]
+    assert budget["pending_turns"] > 0 and budget["dropped_turns"] == 0
+
+    release.set()
+    wait_for_fold(window)
+    request, budget = window.build(messages)
+    assert request[0]["content"].endswith("they talked")
+    assert request[1:] == messages[budget["summarized_turns"]:]
+    assert budget["prompt_tokens"] <= 100
+
+
+def test_failed_fold_trims_to_the_budget():
+    def summarize(prompt):
+        raise RuntimeError("summarizer down")
+
+    window = ContextWindow(summarize, max_prompt_tokens=100, min_recent=2)
+    messages = conversation(12)
+    window.build(messages)
+    wait_for_fold(window)
+    request, budget = window.build(messages)
+    assert window.last_error == "summarizer down"
+    assert budget["dropped_turns"] == budget["pending_turns"] > 0
+    assert budget["prompt_tokens"] <= 100
+    assert request == messages[-budget["sent_turns"]:]
@@ -0,0 +1,57 @@
+# test_stream_render.py
+import math
+import types
+
+from shared import stream_render
+from shared.stream_render import StreamRenderer
+
+
+class FakePlaceholder:
+    def __init__(self):
+        self.html = None
+
+    def markdown(self, html, unsafe_allow_html=False):
+        self.html = html
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self):
+        return self.now
+
+
+def stream(monkeypatch, tokens, seconds_per_token, interval_s=0.05, min_bytes=256):
+    clock = FakeClock()
+    monkeypatch.setattr(stream_render, "time", types.SimpleNamespace(perf_counter=clock.perf_counter))
+    placeholder = FakePlaceholder()
+    renderer = StreamRenderer(placeholder, str, interval_s=interval_s, min_bytes=min_bytes)
+    for token in tokens:
+        clock.now += seconds_per_token
+        renderer.push(token)
+    text = renderer.finish()
+    return renderer, placeholder, text, clock.now
+
+
+def test_fast_stream_renders_logarithmically(monkeypatch):
+    tokens = ["word "] * 20_000  # 100 KB arriving faster than interval_s
+    renderer, placeholder, text, _ = stream(monkeypatch, tokens, seconds_per_token=0.0)
+    assert placeholder.html == text == "".join(tokens)
+    # budget grows by 1/4 of the rendered text: ~log(n / min_bytes) / log(1.25) frames
+    assert renderer.frames <= math.log(len(text) / 256) / math.log(1.25) + 3
+
+
+def test_long_slow_stream_is_paced_by_the_interval(monkeypatch):
+    tokens = ["word "] * 2_000  # 40 s at 50 tokens/s
+    renderer, placeholder, text, duration = stream(monkeypatch, tokens, seconds_per_token=0.02)
+    assert placeholder.html == text == "".join(tokens)
+    # about duration / interval_s frames, not O(log n) and not one per token
+    assert duration / 0.05 * 0.5 <= renderer.frames <= duration / 0.05 + 1
+    assert renderer.frames < len(tokens)
+
+
+def test_very_slow_stream_renders_every_token(monkeypatch):
+    tokens = ["word "] * 50  # slower than interval_s: never more than one frame per token
+    renderer, _, _, _ = stream(monkeypatch, tokens, seconds_per_token=0.5)
+    assert renderer.frames == len(tokens)